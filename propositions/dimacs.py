@@ -0,0 +1,131 @@
+"""DIMACS CNF input and output. Paths ending in .gz or .xz are (de)compressed on the fly.
+Variable v of a DIMACS file is named xv in the solver."""
+import gzip
+import lzma
+from typing import IO, Dict, Iterator, List, Tuple, Union
+
+from propositions.syntax import Formula
+from propositions.sat_solver import Sat_Solver
+
+
+def open_dimacs(path: str, mode: str = 'rt') -> IO[str]:
+    """open path as text, through gzip or xz by its extension"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode)
+    if path.endswith('.xz') or path.endswith('.lzma'):
+        return lzma.open(path, mode)
+    return open(path, mode)
+
+
+def dimacs_variable_name(var: int) -> str:
+    return 'x' + str(var)
+
+
+def read_dimacs(source: Union[str, IO[str]], solver: Union[Sat_Solver, None] = None, **solver_args) -> Sat_Solver:
+    """load DIMACS CNF from a path or text stream into solver (a new one built with solver_args if None) in one
+    pass, clauses go straight to the clause db without building a formula. Variables x1..xn of the header are
+    created up front, so in a new solver DIMACS and solver variable numbers are the same"""
+    if solver is None:
+        solver = Sat_Solver(**solver_args)
+    if isinstance(source, str):
+        with open_dimacs(source) as stream:
+            solver.add_int_clauses(_read_clauses(stream, solver))
+    else:
+        solver.add_int_clauses(_read_clauses(source, solver))
+    return solver
+
+
+def _read_clauses(stream: IO[str], solver: Sat_Solver) -> Iterator[List[int]]:
+    """clauses of stream over solver variables, variables are added to solver as they are met. The stream is
+    tokenized a chunk of lines at a time"""
+    var_ids = [0]  # solver variable of DIMACS variable
+    same_ids = solver.num_vars == 0  # DIMACS variable v is solver variable v, no mapping needed
+
+    def add_variables(num_vars: int):
+        for var in range(len(var_ids), num_vars + 1):
+            name = dimacs_variable_name(var)
+            var_ids.append(solver.var_ids[name] if name in solver.var_ids else solver.new_variable(name))
+
+    clause = []
+    ended = False
+    while not ended:
+        lines = stream.readlines(1 << 20)
+        if not lines:
+            break
+        body = []
+        for line in lines:
+            if line[:1] in 'cp%':
+                if line.startswith('p'):
+                    header = line.split()
+                    if len(header) != 4 or header[1] != 'cnf':
+                        raise ValueError('bad DIMACS header: ' + line.strip())
+                    add_variables(int(header[2]))
+                elif line.startswith('%'):  # end marker of some SATLIB files
+                    ended = True
+                    break
+            else:
+                body.append(line)
+        literals = list(map(int, ' '.join(body).split()))
+        if not literals:
+            continue
+        top = max(max(literals), -min(literals))
+        if top >= len(var_ids):
+            add_variables(top)
+        for lit in literals:
+            if lit:
+                clause.append(lit)
+            else:
+                yield clause if same_ids else [var_ids[lit] if lit > 0 else -var_ids[-lit] for lit in clause]
+                clause = []
+    if clause:
+        yield clause if same_ids else [var_ids[lit] if lit > 0 else -var_ids[-lit] for lit in clause]
+
+
+def cnf_clauses(cnf_formula: Formula) -> Iterator[Tuple[List[str], List[str]]]:
+    """(positive names, negative names) of each clause, like Formula.get_clauses but without recursion"""
+    formulas = [cnf_formula]
+    while formulas:
+        formula = formulas.pop()
+        if formula.root == '&':
+            formulas.append(formula.second)
+            formulas.append(formula.first)
+            continue
+        pos, neg = [], []
+        literals = [formula]
+        while literals:
+            literal = literals.pop()
+            if literal.root == '|':
+                literals.append(literal.second)
+                literals.append(literal.first)
+            elif literal.root == '~':
+                neg.append(literal.first.root)
+            else:
+                pos.append(literal.root)
+        yield pos, neg
+
+
+def write_dimacs(cnf_formula: Formula, target: Union[str, IO[str]]) -> Dict[str, int]:
+    """write CNF formula, e.g. the output of to_tseitin, as DIMACS to a path or text stream. Variables are numbered
+    in sorted name order and listed in 'c var <number> <name>' comment lines, clauses satisfied by a constant are
+    dropped. returns the numbering"""
+    var_ids = {name: var for var, name in enumerate(sorted(cnf_formula.variables()), 1)}
+    clauses = []
+    for pos, neg in cnf_clauses(cnf_formula):
+        if 'T' in pos or 'F' in neg:
+            continue
+        clauses.append([var_ids[name] for name in pos if name != 'F'] +
+                       [-var_ids[name] for name in neg if name != 'T'])
+
+    def write(stream: IO[str]):
+        for name, var in var_ids.items():
+            stream.write('c var %d %s\n' % (var, name))
+        stream.write('p cnf %d %d\n' % (len(var_ids), len(clauses)))
+        for clause in clauses:
+            stream.write(' '.join(map(str, clause)) + (' 0\n' if clause else '0\n'))
+
+    if isinstance(target, str):
+        with open_dimacs(target, 'wt') as stream:
+            write(stream)
+    else:
+        write(target)
+    return var_ids
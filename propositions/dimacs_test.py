@@ -0,0 +1,61 @@
+import io
+import os
+import tempfile
+
+from propositions.dimacs import read_dimacs, write_dimacs, cnf_clauses
+from propositions.sat_solver import SAT_MSG, UNSAT_MSG
+from propositions.semantics import is_satisfiable
+from propositions.syntax import Formula
+from propositions.tseitin import to_tseitin, preprocess_clauses
+
+dimacs_sat = """c simple sat instance
+p cnf 4 4
+1 -2 0
+2 3
+-1 0
+-3 4 0 -4
+-1 0
+"""
+
+dimacs_unsat = """p cnf 2 4
+1 2 0
+-1 2 0
+1 -2 0
+-1 -2 0
+%
+0
+"""
+
+
+def test_read_dimacs(debug=False):
+    solver = read_dimacs(io.StringIO(dimacs_sat))
+    assert solver.num_vars == 4 and solver.var_names[1:] == ['x1', 'x2', 'x3', 'x4']
+    msg, model = solver.solve()
+    if debug:
+        print(msg, model)
+    assert msg == SAT_MSG
+    clauses = [[1, -2], [2, 3, -1], [-3, 4], [-4, -1]]
+    assert all(any(model['x' + str(abs(lit))] == (lit > 0) for lit in clause) for clause in clauses)
+    assert read_dimacs(io.StringIO(dimacs_unsat)).solve()[0] == UNSAT_MSG
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ['f.cnf', 'f.cnf.gz', 'f.cnf.xz']:
+            path = os.path.join(directory, name)
+            write_dimacs(Formula.parse('((x1|~x2)&(~x1|x3))'), path)
+            msg, model = read_dimacs(path, restart_policy='luby').solve()
+            assert msg == SAT_MSG and (model['x1'] or not model['x2']) and (not model['x1'] or model['x3'])
+
+
+def test_write_dimacs(debug=False):
+    for f in ['(x&~x)', '(x|(y&z))', '~(~x|~(y|z))', '((x&y)<->(~x&~y))', '((x|~y)&(~F->(z<->T)))',
+              '((p1|~p2)|~(p3|~~p4))']:
+        f = Formula.parse(f)
+        cnf = preprocess_clauses(to_tseitin(f))
+        stream = io.StringIO()
+        var_ids = write_dimacs(cnf, stream)
+        if debug:
+            print(f, stream.getvalue())
+        assert sorted(var_ids) == sorted(cnf.variables())
+        assert len(list(cnf_clauses(cnf))) >= stream.getvalue().count(' 0\n')
+        msg, _ = read_dimacs(io.StringIO(stream.getvalue())).solve()
+        assert (msg == SAT_MSG) == is_satisfiable(f)
@@ -0,0 +1,143 @@
+"""Cube-and-conquer - a lookahead splits the CNF into cubes, conjunctions of literals that together cover every
+model, and a pool of incremental Sat_Solver workers solves them as assumptions. Workers take the next cube when
+they finish one, so a few hard cubes do not hold up the others."""
+import heapq
+import math
+import multiprocessing
+import os
+import queue
+import time
+from typing import Iterable, List, Tuple, Union
+
+from propositions.sat_helper import UNASSIGNED
+from propositions.sat_portfolio import POLL_INTERVAL, build_solver
+from propositions.sat_solver import Sat_Solver, SAT_MSG, UNSAT_MSG, UNKNOWN_MSG
+
+CUBE_LIMIT = 4096
+LOOKAHEAD_CANDIDATES = 32  # most active free variables looked ahead on at each node
+
+
+def select_branch(solver: Sat_Solver, candidates: int = LOOKAHEAD_CANDIDATES) -> Tuple[Union[List[int], None], int]:
+    """look ahead on both literals of the most active free variables at the current level. A literal that leads
+    to conflict is fixed the other way on its own level and the lookahead starts over. The branch variable is
+    the one whose literals assign the largest product of variables.
+    - return (fixed literals, branch variable), the variable is 0 if none is free
+    - return (None, 0) if both literals of a variable lead to conflict"""
+    values, activity = solver.values, solver.VSIDS_heap.activity
+    fixed = []
+    while True:
+        free = [var for var in range(1, solver.num_vars + 1) if values[var] == UNASSIGNED and
+                not solver.representatives[var] and var not in solver.eliminated]
+        if not free:
+            return fixed, 0
+        best, branch = 0, 0
+        level = solver.level
+        for var in heapq.nlargest(candidates, free, key=activity.__getitem__):
+            positive = solver.assume(var)
+            solver.cancel_until(level)
+            negative = solver.assume(-var)
+            solver.cancel_until(level)
+            if positive is None and negative is None:
+                return None, 0
+            if positive is None or negative is None:
+                lit = var if negative is None else -var
+                solver.assume(lit)
+                fixed.append(lit)
+                break
+            if positive * negative > best:
+                best, branch = positive * negative, var
+        else:
+            return fixed, branch
+
+
+def generate_cubes(solver: Sat_Solver, max_cubes: int = CUBE_LIMIT,
+                   candidates: int = LOOKAHEAD_CANDIDATES) -> List[List[str]]:
+    """split the formula of solver by lookahead into at most max_cubes cubes, branching up to log2(max_cubes)
+    times on each. Every model satisfies exactly one cube, refuted cubes are dropped - no cubes means the
+    formula is unsat. Cubes are lists of literal names, as solve() of a solver over the same clauses takes them"""
+    solver.cancel_until(0)
+    if solver.start_sat()[0] is not True:
+        return []
+    depth = math.ceil(math.log2(max(max_cubes, 1)))
+    values = solver.values
+    cubes, stack = [], [([], 0)]
+    while stack:
+        cube, splits = stack.pop()
+        solver.cancel_until(0)
+        if any(values[abs(lit)] * lit < 0 or (values[abs(lit)] == UNASSIGNED and solver.assume(lit) is None)
+               for lit in cube):
+            continue
+        if splits < depth and len(cubes) + len(stack) + 2 <= max_cubes:
+            fixed, var = select_branch(solver, candidates)
+            if fixed is None:
+                continue
+            cube = cube + fixed
+            if var:
+                stack.append((cube + [-var], splits + 1))
+                stack.append((cube + [var], splits + 1))
+                continue
+        cubes.append(cube)
+    solver.cancel_until(0)
+    names = solver.var_names
+    return [[names[lit] if lit > 0 else '~' + names[-lit] for lit in cube] for cube in cubes]
+
+
+def _cube_worker(source, tasks: multiprocessing.Queue, results: multiprocessing.Queue):
+    solver = build_solver(source, {})
+    for index, cube in iter(tasks.get, None):
+        msg, result = solver.solve(cube)
+        results.put((index, msg, result))
+
+
+def solve_cubes(source: Union[str, Iterable[Iterable[Union[str, int]]]], cubes: Union[List[List], None] = None,
+                workers: Union[int, None] = None, max_cubes: int = CUBE_LIMIT, timeout: Union[float, None] = None):
+    """solve source - a DIMACS path or a clause list, as taken by solve_portfolio - by cube-and-conquer. cubes
+    default to generate_cubes() of a solver over source. They are handed out one at a time to workers (default
+    one per core), each solving its cubes in turn as assumptions of one incremental solver.
+    - return (SAT_MSG, assignments) of the first satisfiable cube
+    - return (UNSAT_MSG, None) once every cube is refuted
+    - return (UNKNOWN_MSG, None) if there was no answer within timeout seconds"""
+    if not isinstance(source, str):
+        source = [list(clause) for clause in source]
+    if cubes is None:
+        cubes = generate_cubes(build_solver(source, {}), max_cubes)
+    if not cubes:
+        return UNSAT_MSG, None
+    workers = min(workers or os.cpu_count() or 1, len(cubes))
+    tasks, results = multiprocessing.Queue(), multiprocessing.Queue()
+    for task in enumerate(cubes):
+        tasks.put(task)
+    for _ in range(workers):
+        tasks.put(None)
+    processes = [multiprocessing.Process(target=_cube_worker, args=(source, tasks, results), daemon=True)
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    remaining = len(cubes)
+    try:
+        while True:
+            try:
+                _, msg, result = results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return UNKNOWN_MSG, None
+                if not any(process.is_alive() for process in processes) and results.empty():
+                    raise RuntimeError('all cube workers exited before every cube was solved')
+                continue
+            if msg == SAT_MSG:
+                return msg, result
+            remaining -= 1
+            if not result or not remaining:  # an empty core refutes the formula itself
+                return UNSAT_MSG, None
+            if deadline is not None and time.monotonic() >= deadline:
+                return UNKNOWN_MSG, None
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+        tasks.cancel_join_thread()
+        tasks.close()
+        results.close()
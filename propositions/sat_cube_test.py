@@ -0,0 +1,43 @@
+import itertools
+
+from propositions.sat_cube import generate_cubes, select_branch, solve_cubes
+from propositions.sat_solver import Sat_Solver, SAT_MSG, UNSAT_MSG, UNKNOWN_MSG
+from propositions.test_sat_algorithm import pigeonhole_clauses
+from solver import run_sat_cubes
+
+
+def test_generate_cubes(debug=False):
+    clauses = [[1, 2, 3], [-1, -2], [-2, -3], [-1, 4], [-4, 5, -3], [2, -5, 6], [-6, 1, 3], [4, 5, 6]]
+    for max_cubes in [1, 2, 8, 64]:
+        cubes = generate_cubes(Sat_Solver(clauses=clauses), max_cubes)
+        if debug:
+            print(max_cubes, cubes)
+        assert 0 < len(cubes) <= max_cubes
+        # every model satisfies exactly one cube
+        for bits in itertools.product([False, True], repeat=6):
+            model = {'x' + str(var): value for var, value in enumerate(bits, 1)}
+            if all(any(model['x' + str(abs(lit))] == (lit > 0) for lit in clause) for clause in clauses):
+                assert sum(all(model[lit.lstrip('~')] != lit.startswith('~') for lit in cube)
+                           for cube in cubes) == 1
+
+    # x1 fails - the lookahead fixes ~x1 before branching
+    solver = Sat_Solver(clauses=[[-1, 2], [-1, 3], [-2, -3], [4, 5], [-4, 6]])
+    fixed, var = select_branch(solver)
+    assert fixed == [-1] and var
+    assert generate_cubes(Sat_Solver(clauses=pigeonhole_clauses(3)), 64) == []
+
+
+def test_solve_cubes(debug=False):
+    assert solve_cubes(pigeonhole_clauses(5), workers=3, max_cubes=16) == (UNSAT_MSG, None)
+    clauses = pigeonhole_clauses(5)[1:]
+    msg, model = solve_cubes(clauses, workers=3)
+    if debug:
+        print(msg, model)
+    assert msg == SAT_MSG
+    assert all(any(model['x' + str(abs(lit))] == (lit > 0) for lit in clause) for clause in clauses)
+    assert solve_cubes(clauses, cubes=[['~x' + str(var) for var in range(6, 11)]], workers=1) == (UNSAT_MSG, None)
+
+    msg, model = run_sat_cubes('((p|q)&((~p|~q)&(q|r)))', workers=2)
+    assert msg == SAT_MSG and model['p'] != model['q'] and (model['q'] or model['r'])
+    # out of time, like a solver out of its budget
+    assert solve_cubes(pigeonhole_clauses(10), cubes=[[]], workers=1, timeout=0.2) == (UNKNOWN_MSG, None)
@@ -1,312 +1,360 @@
 import copy
-# from typing import MutableMapping
+from array import array
+from typing import Iterable
 
 from propositions.syntax import *
 
-# list of positive vars in clause
-P_C = List[str]
-# tuple of positive vars in clause
-Positive_Cvars = Tuple[str]
+# per variable assignment values, literal l is true iff values[abs(l)] * l > 0
+TRUE = 1
+FALSE = -1
+UNASSIGNED = 0
 
-# list of negative vars in clause
-N_C = List[str]
-# tuple of negative vars in clause
-Negative_Cvars = Tuple[str]
 
+def lit_index(lit: int) -> int:
+    """index of a signed literal in per literal arrays - 2v for v and 2v+1 for ~v"""
+    return lit << 1 if lit > 0 else (-lit << 1) | 1
 
-class Clause:
-    """If clause is newly unit than wv1 should be updated to contain the unit variable to be propagated"""
 
-    positive_variables: Positive_Cvars
-    negative_variables: Negative_Cvars
-    first_wv: str
-    second_wv: str
-    __is_unit_clause: bool
+def canonical_hash(literals: Iterable[int]) -> int:
+    """order independent hash of clause literals"""
+    return hash(tuple(sorted(literals)))
 
-    def __init__(self, clause: Tuple[P_C, N_C]) -> None:
-        self.positive_variables = tuple(clause[0])
-        self.negative_variables = tuple(clause[1])
 
-        self.first_wv = list(self.positive_variables + self.negative_variables)[0]
-        if len(self.positive_variables) + len(self.negative_variables) == 1:
-            self.__is_unit_clause = True
-            # set second?
+class Clause:
+    """Clause over signed int literals (v for variable v, -v for its negation) that is not in the clause db yet -
+    a learned or theory clause on its way to backtrack().
+    The watch literals are always literals[0] and literals[1]. If clause is newly unit than literals[0] is the
+    unit literal to be propagated"""
+    __slots__ = ('literals', 'hash')
 
-        else:
-            self.second_wv = list(self.positive_variables + self.negative_variables)[1]
-            self.__is_unit_clause = False
+    literals: List[int]
+    hash: int
+
+    def __init__(self, literals: Iterable[int]) -> None:
+        self.literals = list(literals)
+        self.hash = canonical_hash(self.literals)
 
     def __eq__(self, other: object) -> bool:
-        return isinstance(other, Clause) and str(self) == str(other)
+        return isinstance(other, Clause) and self.hash == other.hash and \
+               sorted(self.literals) == sorted(other.literals)
 
     def __ne__(self, other: object) -> bool:
         return not self == other
 
     def __hash__(self) -> int:
-        return hash(str(self))
+        return self.hash
 
     def __repr__(self) -> str:
-        return str(sorted(self.positive_variables)) + "  " + "~" + str(sorted(self.negative_variables))
+        return str(sorted(self.literals, key=abs))
 
-    def is_unit_clause(self) -> bool:
-        if self.__is_unit_clause:
-            return True
-        return False
+    def __len__(self) -> int:
+        return len(self.literals)
 
+    def is_unit_clause(self) -> bool:
+        return len(self.literals) == 1
 
-    def get_wv1(self):
-        return self.first_wv
-
-    def set_wv1(self, wv: str):
-        assert wv in self.positive_variables or wv in self.negative_variables
-        self.first_wv = wv
+    def get_wv1(self) -> int:
+        return self.literals[0]
 
-    def get_wv2(self):
-        return self.second_wv
+    def set_wv1(self, wv: int):
+        """move literal wv to the first watch position"""
+        position = self.literals.index(wv)
+        self.literals[0], self.literals[position] = wv, self.literals[0]
 
-    def set_wv2(self, wv: str):
-        assert not self.__is_unit_clause
-        assert wv in self.positive_variables or wv in self.negative_variables
-        self.second_wv = wv
+    def get_wv2(self) -> int:
+        return self.literals[1]
 
-    def is_positive_variable(self, var: str) -> bool:
-        assert var in self.positive_variables or var in self.negative_variables
-        return var in self.positive_variables
+    def set_wv2(self, wv: int):
+        """move literal wv to the second watch position"""
+        assert not self.is_unit_clause()
+        position = self.literals.index(wv)
+        self.literals[1], self.literals[position] = wv, self.literals[1]
 
     def get_variables(self):
-        variables = set(self.positive_variables).union(set(self.negative_variables))
-        return variables
-
-    def resolve(self, other):
-        """resolve current clause with other clause
-        - returns new unified clause without conflicting literal
-        """
-        other_pos = set(other.positive_variables)
-        other_neg = set(other.negative_variables)
-
-        local_pos = set(self.positive_variables)
-        local_neg = set(self.negative_variables)
-
-        pos = other_pos | local_pos
-        neg = other_neg | local_neg
-        conflict_literal = pos & neg
-        assert len(conflict_literal) == 1
-        pos.difference_update(conflict_literal)
-        neg.difference_update(conflict_literal)
-        pos = list(pos)
-        neg = list(neg)
-        resolvent = Clause(tuple((pos, neg)))
-        return resolvent
-
-    def is_newly_unit(self, assignment_dict: {}, v: str):
-        """helper function for
-        >>>self.find_legal_wv()
-         - check if new wv assignment is unit and return accordingly
-          - in unit case makes sure that unit wv is in first
-        """
-        if assignment_dict[v] is not None:
-            return [v, None]
-
-        if assignment_dict[self.first_wv] is None and assignment_dict[self.second_wv] is not None:
-            return [self.first_wv, True]
-        if assignment_dict[self.second_wv] is None and assignment_dict[self.first_wv] is not None:
-            var = self.get_wv2()
-            self.set_wv2(self.get_wv1())
-            self.set_wv1(var)
-            return [self.first_wv, True]
-        return [v, None]
-
-
-    def find_legal_wv(self, wv_to_replace: str, assignment_dict: {}):
-        """Assumes clause is not unit
-        if clause is newly unit -update return variable
-        if clause is non unit - update + return true
-        if clause is contradiction return false
-
-        """
-        assert not self.__is_unit_clause
-        assert wv_to_replace == self.second_wv or wv_to_replace == self.first_wv
-
-        # already true case
-        if self.is_positive_variable(self.first_wv) is assignment_dict[self.first_wv] or \
-                self.is_positive_variable(self.second_wv) is assignment_dict[self.second_wv]:
-            return [True, None]
-
-        # non unit new wv case
-        for v in self.negative_variables:
-            if assignment_dict[v] is not True or assignment_dict[v] is None:
-                if v != self.first_wv and v != self.second_wv:
-                    if self.first_wv == wv_to_replace:
-                        self.set_wv1(v)
-                    else:
-                        self.set_wv2(v)
-                    return self.is_newly_unit(assignment_dict, v)
-        for v in self.positive_variables:
-            if assignment_dict[v] is not False or assignment_dict[v] is None:
-                if v != self.first_wv and v != self.second_wv:
-                    if self.first_wv == wv_to_replace:
-                        self.set_wv1(v)
-                    else:
-                        self.set_wv2(v)
-                    return self.is_newly_unit(assignment_dict, v)
-
-        # newly unit case
-        if assignment_dict[self.first_wv] is None or \
-                assignment_dict[self.second_wv] is None:
-            if self.first_wv == wv_to_replace:
-                self.first_wv = self.second_wv
-                self.second_wv = wv_to_replace
-            return [self.first_wv, True]
-
-        # contradiction case
-        return [None, False]
-
-
-# clauses watched by x  accdng to x, ~x
-P_Clauses_WATCHED = List[Clause]
-N_Clauses_WATCHED = List[Clause]
-# all clauses watched by x
-# WATCHED_CLAUSES = List[P_Clauses_WATCHED, N_Clauses_WATCHED]
-
-# master dict of watched clauses
-# WATCH_VARIABLES_DICT = MutableMapping[str, WATCHED_CLAUSES]
-POSITIVES = 0
-NEGATIVES = 1
+        return set(abs(lit) for lit in self.literals)
 
 
-class WatchVariableDb:
-    watch_variable_dict: {} #MutableMapping[str, WATCHED_CLAUSES]
-
-    def __init__(self, variables: set) -> None:
-        self.watch_variable_dict = {}
-        for var in variables:
-            self.watch_variable_dict[var] = [[], []]
-
-    def insert_clause_wv_to_wvdict(self, clause: Clause, wv: str):
-        """insert clause-wv pair to dict, does not verify correctness or remove old wvs"""
-        if wv not in self.watch_variable_dict.keys():
-            self.watch_variable_dict[wv] = [[], []]
-        if clause.is_positive_variable(wv):
-            self.watch_variable_dict[wv][POSITIVES].append(clause)
-        else:
-            self.watch_variable_dict[wv][NEGATIVES].append(clause)
-
-    def insert_clause_to_wv_db_l0(self, clause: Clause):
-        wv1 = clause.get_wv1()
-        self.insert_clause_wv_to_wvdict(clause, wv1)
-
-        if not clause.is_unit_clause():
-            wv2 = clause.get_wv2()
-            self.insert_clause_wv_to_wvdict(clause, wv2)
-
-    def get_clauses_to_be_fixed(self, wv: str, illegal_setting: bool):
-        """returns clauses with bad watch variable"""
-        if illegal_setting:
-            bad_clauses = self.watch_variable_dict[wv][POSITIVES]
-            self.watch_variable_dict[wv][POSITIVES] = []
-            return bad_clauses
-        else:
-            bad_clauses = self.watch_variable_dict[wv][NEGATIVES]
-            self.watch_variable_dict[wv][NEGATIVES] = []
-            return bad_clauses
-
-    def positive_len(self, var):
-        return len(self.watch_variable_dict[var][POSITIVES])
+# clause flags in ClauseArena.flags
+LEARNED = 1
+DELETED = 2
+USED = 4  # took part in conflict analysis since the last db reduction
 
-    def negative_len(self, var):
-        return len(self.watch_variable_dict[var][NEGATIVES])
 
-
-class ImplicationNode:
+class ClauseArena:
     """
-    Represents a node in an implication graph. Each node contains
-    - its value
-    - its implication children (list)
-    - parent nodes (list)
+    The clause db. Literals of all clauses are kept back to back in one flat array('i'), a clause is referred to
+    by its cref - an index into the header arrays holding the offset of its first literal, its size, canonical
+    hash, flags, and for learned clauses its LBD and activity. The first two literals of a stored clause are its
+    watch literals.
+    Crefs of deleted clauses are reused, their literals stay in place as garbage until collect_garbage().
+    index maps canonical hash to cref of original clauses, so duplicate input clauses are stored once.
     """
-
-    def __init__(self, variable: str, value: Union[bool, None]):
-        self.variable = variable
-        self.value = value
-        self.level = -1
-        self.parents = []
-        self.children = []
-        self.clause = None
-
-    def __str__(self):
-        sign = '+' if self.value == True else '-' if self.value == False else '?'
-        return "[{}{}:L{}, {}p, {}c, {}]".format(
-            sign, self.variable, self.level, len(self.parents), len(self.children), self.clause)
-
-    def __repr__(self):
-        return str(self)
-
-    def get_parent_clause(self):
-        return self.clause
-
-    def all_paths_to_conflict_clause(self, conflict_variables: set):
-        """given set of conflict variables find all paths from current node to
-        conflict variables, if empty return []"""
-        if self.variable in conflict_variables:
-            return [[self.variable]]
-
-        all_paths = []
-        for child in self.children:
-            child_paths = child.all_paths_to_conflict_clause(conflict_variables)
-            for path in child_paths:
-                if path:
-                    all_paths.append([self.variable] + path)
-        return all_paths
-
+    __slots__ = ('literals', 'offsets', 'sizes', 'hashes', 'flags', 'lbds', 'activities', 'index', 'free_crefs',
+                 'garbage')
+
+    literals: array
+    offsets: array
+    sizes: array
+    hashes: array
+    flags: array
+    lbds: array
+    activities: array
+    index: {int: int}
+    free_crefs: List[int]
+
+    def __init__(self):
+        self.literals = array('i')
+        self.offsets = array('q')
+        self.sizes = array('i')
+        self.hashes = array('q')
+        self.flags = array('b')
+        self.lbds = array('i')
+        self.activities = array('d')
+        self.index = {}
+        self.free_crefs = []
+        self.garbage = 0  # number of deleted literals in self.literals
+
+    def __len__(self) -> int:
+        return len(self.sizes) - len(self.free_crefs)
+
+    def add(self, literals: List[int], clause_hash: Union[int, None] = None, learned: bool = False,
+            lbd: int = 0) -> int:
+        """store clause, return its cref"""
+        clause_hash = canonical_hash(literals) if clause_hash is None else clause_hash
+        flags = LEARNED if learned else 0
+        if self.free_crefs:
+            cref = self.free_crefs.pop()
+            self.offsets[cref] = len(self.literals)
+            self.sizes[cref] = len(literals)
+            self.hashes[cref] = clause_hash
+            self.flags[cref] = flags
+            self.lbds[cref] = lbd
+            self.activities[cref] = 0.0
+        else:
+            cref = len(self.sizes)
+            self.offsets.append(len(self.literals))
+            self.sizes.append(len(literals))
+            self.hashes.append(clause_hash)
+            self.flags.append(flags)
+            self.lbds.append(lbd)
+            self.activities.append(0.0)
+        self.literals.extend(literals)
+        return cref
+
+    def add_original(self, literals: List[int]) -> Union[int, None]:
+        """store original clause unless it is already stored, return its cref or None for duplicates"""
+        clause_hash = canonical_hash(literals)
+        cref = self.index.get(clause_hash)
+        if cref is not None and sorted(self.get_literals(cref)) == sorted(literals):
+            return None
+        cref = self.add(literals, clause_hash)
+        self.index.setdefault(clause_hash, cref)
+        return cref
+
+    def delete(self, cref: int):
+        """mark clause deleted, caller is responsible for removing it from watch lists"""
+        self.flags[cref] = DELETED
+        self.garbage += self.sizes[cref]
+        self.sizes[cref] = 0
+        self.free_crefs.append(cref)
+
+    def is_deleted(self, cref: int) -> bool:
+        return self.flags[cref] & DELETED != 0
+
+    def collect_garbage(self):
+        """move live literals back to back, crefs stay the same"""
+        literals = array('i')
+        offsets, sizes = self.offsets, self.sizes
+        for cref in sorted(range(len(sizes)), key=offsets.__getitem__):
+            offset = offsets[cref]
+            offsets[cref] = len(literals)
+            literals.extend(self.literals[offset:offset + sizes[cref]])
+        self.literals = literals
+        self.garbage = 0
+
+    def get_literals(self, cref: int) -> array:
+        offset = self.offsets[cref]
+        return self.literals[offset:offset + self.sizes[cref]]
+
+    def get_clause(self, cref: int) -> Clause:
+        return Clause(self.get_literals(cref))
 
 
-class DecisionLevel:
+class WatchVariableDb:
+    """watched clauses by literal. The clauses watched by lit are visited when lit becomes false, they are kept
+    in watch_lists[lit_index(lit)] as a flat list of cref, blocking literal pairs:
+    [cref1, blocker1, cref2, blocker2, ...]
+    the blocker is some other literal of the clause, if it is true the clause is satisfied and is skipped without
+    being touched.
+    Binary clauses are not watched, instead binary_lists[lit_index(lit)] holds [implied1, cref1, ...] - the
+    literals implied when lit becomes false along with their clause, which is only kept as reason"""
+    watch_lists: List[list]
+    binary_lists: List[list]
+
+    def __init__(self, num_variables: int) -> None:
+        self.watch_lists = [[] for _ in range(2 * num_variables + 2)]
+        self.binary_lists = [[] for _ in range(2 * num_variables + 2)]
+
+    def add_variable(self):
+        self.watch_lists.extend(([], []))
+        self.binary_lists.extend(([], []))
+
+    def insert_clause_wv_to_wvdict(self, cref: int, wv: int, blocker: int):
+        """insert clause-wv pair to db, does not verify correctness or remove old wvs"""
+        watches = self.watch_lists[lit_index(wv)]
+        watches.append(cref)
+        watches.append(blocker)
+
+    def insert_clause_to_wv_db_l0(self, cref: int, wv1: int, wv2: int):
+        self.insert_clause_wv_to_wvdict(cref, wv1, wv2)
+        self.insert_clause_wv_to_wvdict(cref, wv2, wv1)
+
+    def insert_binary_clause(self, cref: int, first: int, second: int):
+        implications = self.binary_lists[lit_index(first)]
+        implications.append(second)
+        implications.append(cref)
+        implications = self.binary_lists[lit_index(second)]
+        implications.append(first)
+        implications.append(cref)
+
+    def remove_deleted(self, clause_db: ClauseArena):
+        """drop watches of deleted clauses"""
+        flags = clause_db.flags
+        for watches in self.watch_lists:
+            j = 0
+            for i in range(0, len(watches), 2):
+                if not flags[watches[i]] & DELETED:
+                    watches[j] = watches[i]
+                    watches[j + 1] = watches[i + 1]
+                    j += 2
+            del watches[j:]
+
+    def get_clauses_to_be_fixed(self, false_lit: int) -> list:
+        """returns the watch list of the newly false literal, it is compacted in place by the propagation"""
+        return self.watch_lists[lit_index(false_lit)]
+
+    def positive_len(self, var: int):
+        index = lit_index(var)
+        return (len(self.watch_lists[index]) + len(self.binary_lists[index])) >> 1
+
+    def negative_len(self, var: int):
+        index = lit_index(-var)
+        return (len(self.watch_lists[index]) + len(self.binary_lists[index])) >> 1
+
+
+class VariableHeap:
     """
-    Represents history in a decision level. Each DecisionLevel contains
-    - its decision variable
-    - its implication children (list) in order of assignment
+    Indexed binary max heap of variables ordered by VSIDS activity, ties broken by smaller variable.
+    Instead of decaying every activity after a conflict the bump increment grows by 1/decay, activities are
+    rescaled only when they pass RESCALE_LIMIT. Assigned variables are dropped lazily by the solver when popped
+    and are put back by insert() on backtrack.
     """
-    decision_variable: str
-    assignment_history: []
-
-    def __init__(self, variable: str):
-        self.decision_variable = variable
-        self.assignment_history = [self.decision_variable]
-
-    def __str__(self):
-        return "dvar: " + str(self.decision_variable) + " hist: " + str(self.assignment_history)
-
-    def __repr__(self):
-        return str(self)
-
-    def add_assignment(self, v: str):
-        self.assignment_history.append(v)
-
-    def find_last_assigned_literal(self, clause: Clause) -> str:
-        clause_vars = clause.get_variables()
-        for var in reversed(self.assignment_history):
-            if var in clause_vars:
-                return var
-        assert False
-
-    def find_first_uip(self, clause: Clause, nodes_dict: {}):
-        conflict_vars = clause.get_variables()
-        all_paths = nodes_dict[self.decision_variable].all_paths_to_conflict_clause(conflict_vars)
-
-        if len(all_paths) == 1:
-            return all_paths[0][-1] # single path, last lit  is uip
-
-        p1 = all_paths[0]
-        path_intersections = set(p1)
-        for path in all_paths:
-            path_intersections.intersection_update(set(path))
-
-        for ip in reversed(p1):
-            if ip in path_intersections:
-                return ip
-
-    def get_assignment_history(self):
-        return self.assignment_history
-
-
-VSIDS_DICT = MutableMapping[str, int]
+    RESCALE_LIMIT = 1e100
+
+    activity: List[float]
+    heap: List[int]
+    indices: List[int]  # position of variable in heap, -1 if not in heap
+
+    def __init__(self, num_variables: int, decay: float = 0.95):
+        self.activity = [0.0] * (num_variables + 1)
+        self.heap = []
+        self.indices = [-1] * (num_variables + 1)
+        self.bump_increment = 1.0
+        self.decay = decay
+        for var in range(1, num_variables + 1):
+            self.insert(var)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def add_variable(self):
+        self.activity.append(0.0)
+        self.indices.append(-1)
+        self.insert(len(self.activity) - 1)
+
+    def __contains__(self, var: int):
+        return self.indices[var] >= 0
+
+    def _before(self, a: int, b: int) -> bool:
+        activity = self.activity
+        return activity[a] > activity[b] or (activity[a] == activity[b] and a < b)
+
+    def _sift_up(self, position: int):
+        heap, indices = self.heap, self.indices
+        var = heap[position]
+        while position > 0:
+            parent = (position - 1) >> 1
+            if not self._before(var, heap[parent]):
+                break
+            heap[position] = heap[parent]
+            indices[heap[position]] = position
+            position = parent
+        heap[position] = var
+        indices[var] = position
+
+    def _sift_down(self, position: int):
+        heap, indices = self.heap, self.indices
+        var = heap[position]
+        size = len(heap)
+        while True:
+            child = 2 * position + 1
+            if child >= size:
+                break
+            if child + 1 < size and self._before(heap[child + 1], heap[child]):
+                child += 1
+            if not self._before(heap[child], var):
+                break
+            heap[position] = heap[child]
+            indices[heap[position]] = position
+            position = child
+        heap[position] = var
+        indices[var] = position
+
+    def insert(self, var: int):
+        if self.indices[var] >= 0:
+            return
+        self.heap.append(var)
+        self._sift_up(len(self.heap) - 1)
+
+    def pop(self) -> int:
+        """remove and return variable with highest activity"""
+        heap = self.heap
+        top = heap[0]
+        last = heap.pop()
+        self.indices[top] = -1
+        if heap:
+            heap[0] = last
+            self._sift_down(0)
+        return top
+
+    def remove(self, var: int):
+        position = self.indices[var]
+        if position < 0:
+            return
+        heap = self.heap
+        last = heap.pop()
+        self.indices[var] = -1
+        if position < len(heap):
+            heap[position] = last
+            self.indices[last] = position
+            self._sift_up(position)
+            self._sift_down(self.indices[last])
+
+    def bump(self, var: int):
+        activity = self.activity
+        activity[var] += self.bump_increment
+        if activity[var] > self.RESCALE_LIMIT:
+            for v in range(1, len(activity)):
+                activity[v] /= self.RESCALE_LIMIT
+            self.bump_increment /= self.RESCALE_LIMIT
+        if self.indices[var] >= 0:
+            self._sift_up(self.indices[var])
+
+    def rebuild(self):
+        """restore heap order after activities were changed directly"""
+        for position in range((len(self.heap) >> 1) - 1, -1, -1):
+            self._sift_down(position)
+
+    def decay_activities(self):
+        """equivalent to multiplying every activity by decay"""
+        self.bump_increment /= self.decay
@@ -0,0 +1,93 @@
+"""Parallel portfolio - diversified Sat_Solver workers race on the same CNF in separate processes, the first
+answer wins and the other workers are terminated."""
+import multiprocessing
+import os
+import queue
+from typing import Dict, Iterable, List, Union
+
+from propositions.dimacs import read_dimacs
+from propositions.sat_sharing import ClauseExchange
+from propositions.sat_solver import Sat_Solver, UNKNOWN_MSG
+
+RESTART_POLICIES = ['glucose', 'luby', 'geometric']
+POLARITIES = ['watch', 'false', 'true', 'random']
+POLL_INTERVAL = 0.1  # seconds between checks for crashed workers
+
+
+def portfolio_configs(workers: int) -> List[Dict]:
+    """Sat_Solver keyword arguments of each worker. The first worker runs the default solver, the others vary
+    restart policy, default polarity, random seed, inprocessing and preprocessing"""
+    configs = [{}]
+    for i in range(1, workers):
+        configs.append({'restart_policy': RESTART_POLICIES[i % len(RESTART_POLICIES)],
+                        'polarity': POLARITIES[i % len(POLARITIES)],
+                        'seed': i,
+                        'inprocessing': i % 4 != 3,
+                        'preprocess': i % 2 == 1})
+    return configs
+
+
+def build_solver(source: Union[str, List[List[Union[str, int]]]], config: Dict) -> Sat_Solver:
+    """solver of config over source - a DIMACS path or a clause list"""
+    config = dict(config)
+    preprocess = config.pop('preprocess', False)
+    if isinstance(source, str):
+        solver = read_dimacs(source, **config)
+    else:
+        solver = Sat_Solver(clauses=source, **config)
+    if preprocess:
+        solver.preprocess()
+    return solver
+
+
+def _worker(index: int, source, config: Dict, assumptions: List, results: multiprocessing.Queue,
+            exchange: Union[ClauseExchange, None]):
+    if assumptions:
+        config = dict(config, preprocess=False)
+    solver = build_solver(source, config)
+    if exchange is not None:
+        exchange.index = index
+        solver.exchange = exchange
+    msg, result = solver.solve(assumptions)
+    results.put((index, msg, result))
+
+
+def solve_portfolio(source: Union[str, Iterable[Iterable[Union[str, int]]]], workers: Union[int, None] = None,
+                    configs: Union[List[Dict], None] = None, assumptions: Iterable[Union[str, int]] = (),
+                    timeout: Union[float, None] = None, share: bool = True):
+    """solve source - a DIMACS path, read by every worker, or a clause list as taken by Sat_Solver - with a
+    portfolio of workers (default one per core) under assumptions. With share, workers exchange their short low
+    LBD learned clauses through a ClauseExchange.
+    - return (SAT_MSG or UNSAT_MSG, result) of the first worker to finish, like Sat_Solver.solve()
+    - return (UNKNOWN_MSG, None) if no worker finished within timeout seconds"""
+    if not isinstance(source, str):
+        source = [list(clause) for clause in source]
+    configs = portfolio_configs(workers or os.cpu_count() or 1) if configs is None else configs
+    assumptions = list(assumptions)
+    results = multiprocessing.Queue()
+    exchange = ClauseExchange(len(configs)) if share and len(configs) > 1 else None
+    processes = [multiprocessing.Process(target=_worker, args=(i, source, config, assumptions, results, exchange),
+                                         daemon=True) for i, config in enumerate(configs)]
+    for process in processes:
+        process.start()
+    waited = 0.0
+    try:
+        while True:
+            try:
+                _, msg, result = results.get(timeout=POLL_INTERVAL)
+                return msg, result
+            except queue.Empty:
+                waited += POLL_INTERVAL
+            if timeout is not None and waited >= timeout:
+                return UNKNOWN_MSG, None
+            if not any(process.is_alive() for process in processes) and results.empty():
+                raise RuntimeError('all portfolio workers exited without an answer')
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+        results.close()
+        if exchange is not None:
+            exchange.close()
@@ -0,0 +1,102 @@
+import os
+import pickle
+import tempfile
+
+from propositions.dimacs import write_dimacs
+from propositions.sat_portfolio import solve_portfolio, portfolio_configs
+from propositions.sat_sharing import ClauseExchange
+from propositions.sat_solver import Sat_Solver, SAT_MSG, UNSAT_MSG, UNKNOWN_MSG
+from propositions.syntax import Formula
+from propositions.test_sat_algorithm import pigeonhole_clauses
+from solver import run_sat_portfolio
+
+
+def test_portfolio_configs(debug=False):
+    configs = portfolio_configs(8)
+    if debug:
+        print(configs)
+    assert len(configs) == 8 and configs[0] == {}
+    assert len(set(config['seed'] for config in configs[1:])) == 7
+    assert len(set(config['polarity'] for config in configs[1:])) > 1
+    for config in configs:
+        config = dict(config)
+        config.pop('preprocess', None)
+        Sat_Solver(clauses=[[1, 2]], **config)
+
+    for polarity in ['true', 'false', 'random']:
+        msg, model = Sat_Solver(clauses=[[1, 2, 3]], polarity=polarity, seed=1, inprocessing=False).solve()
+        assert msg == SAT_MSG
+        if polarity == 'true':
+            assert list(model.values()) == [True] * 3
+        elif polarity == 'false':
+            assert list(model.values()).count(True) == 1  # the last one is propagated
+
+
+def test_solve_portfolio(debug=False):
+    msg, result = solve_portfolio(pigeonhole_clauses(4), workers=3)
+    assert msg == UNSAT_MSG and result is None
+
+    clauses = pigeonhole_clauses(4)[1:]
+    msg, model = solve_portfolio(clauses, workers=3)
+    if debug:
+        print(msg, model)
+    assert msg == SAT_MSG
+    assert all(any(model['x' + str(abs(lit))] == (lit > 0) for lit in clause) for clause in clauses)
+
+    msg, core = solve_portfolio(clauses, workers=2, assumptions=['x1', 'x5'])
+    assert msg == UNSAT_MSG and sorted(core) == ['x1', 'x5']
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'f.cnf')
+        write_dimacs(Formula.parse('((x1|x2)&((~x1|x2)&((x1|~x2)&(~x1|~x2))))'), path)
+        assert solve_portfolio(path, workers=2) == (UNSAT_MSG, None)
+
+    msg, model = run_sat_portfolio('((p|q)&(~p|~q))', workers=2)
+    assert msg == SAT_MSG and model['p'] != model['q']
+    # out of time, like a solver out of its budget
+    assert solve_portfolio(pigeonhole_clauses(10), workers=2, timeout=0.2) == (UNKNOWN_MSG, None)
+
+
+def test_clause_exchange(debug=False):
+    exchange = ClauseExchange(3, capacity=16)
+    writer = pickle.loads(pickle.dumps(exchange))  # attached by name, as in a spawned worker
+    writer.index = 1
+    reader = pickle.loads(pickle.dumps(exchange))
+    reader.index = 0
+    try:
+        writer.export([1, -2, 3], 2)
+        writer.export([-4], 1)
+        assert list(reader.imports()) == [([1, -2, 3], 2), ([-4], 1)]
+        assert list(reader.imports()) == []
+        # records wrap around the end of the ring
+        writer.export([5, 6, 7, 8], 3)
+        writer.export([9, -10], 2)
+        if debug:
+            print(writer.written, list(writer.data[16:32]))
+        assert list(reader.imports()) == [([5, 6, 7, 8], 3), ([9, -10], 2)]
+        # a lapped reader skips what it missed
+        for i in range(1, 6):
+            writer.export([i, -i - 1], 2)
+        assert list(reader.imports()) == []
+        writer.export([11], 1)
+        assert list(reader.imports()) == [([11], 1)]
+        # a record being written overwrites words of published ones before it is published itself
+        writer.export([1, 2, 3], 2)
+        writer.export([3, 4, 5, 6, 7, 8, 9, 10], 3)
+        position = writer.written
+        writer.reserved[1] = position + 5
+        for k, word in enumerate([3, 2, 12, 13, 14], position):
+            writer.data[16 + k % 16] = word
+        assert list(reader.imports()) == []
+        writer.positions[1] = writer.written = position + 5
+        assert list(reader.imports()) == [([12, 13, 14], 2)]
+        writer.close()
+        reader.close()
+    finally:
+        exchange.close()
+
+    clauses = pigeonhole_clauses(5)
+    assert solve_portfolio(clauses, workers=3, share=True) == (UNSAT_MSG, None)
+    msg, model = solve_portfolio(clauses[1:], workers=3, share=True)
+    assert msg == SAT_MSG
+    assert all(any(model['x' + str(abs(lit))] == (lit > 0) for lit in clause) for clause in clauses[1:])
@@ -0,0 +1,220 @@
+"""SatELite style CNF preprocessing over int literals - unit propagation, backward subsumption, self-subsuming
+strengthening and bounded variable elimination, all driven by occurrence lists. The clauses of eliminated
+variables are kept on an elimination stack, which extends a model of the simplified CNF to a model of the input."""
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+from propositions.sat_helper import lit_index
+from propositions.sat_proof import Proof
+
+OCCURRENCE_LIMIT = 16  # variables with more clauses than this are not eliminated
+RESOLVENT_LIMIT = 20  # an elimination adding a longer resolvent is skipped
+ELIMINATION_ROUNDS = 3
+
+
+def signature(clause: List[int]) -> int:
+    """bit per variable mod 64, clause c can only subsume d if signature(c) & ~signature(d) == 0"""
+    sig = 0
+    for lit in clause:
+        sig |= 1 << ((lit if lit > 0 else -lit) & 63)
+    return sig
+
+
+class Preprocessor:
+    """
+    Simplifies a list of int clauses. run() returns False if the CNF is unsat, get_clauses() gives the simplified
+    CNF, which is satisfiable iff the input is, and extend_model() turns its models into models of the input.
+    Frozen variables are never eliminated - variables of clauses added later or of assumptions must be frozen.
+    With a DRAT proof every derived clause is added to it before the clauses it comes from are deleted, unit
+    clauses are kept.
+    clauses[i] is None once clause i is removed, occurrences[lit_index(lit)] is the set of clauses holding lit.
+    """
+    clauses: List[Union[List[int], None]]
+    signatures: List[int]
+    occurrences: List[Set[int]]
+    fixed: List[int]  # literals fixed by unit clauses, their clauses are removed
+    elimination_stack: List[Tuple[int, List[int]]]  # (pivot literal, clause) of eliminated variables
+
+    def __init__(self, clauses: Iterable[Iterable[int]], frozen: Iterable[int] = (), proof: Union[Proof, None] = None):
+        clauses = [set(clause) for clause in clauses]
+        self.num_vars = max((abs(lit) for clause in clauses for lit in clause), default=0)
+        self.clauses = []
+        self.signatures = []
+        self.occurrences = [set() for _ in range(2 * self.num_vars + 2)]
+        self.values = [0] * (self.num_vars + 1)
+        self.frozen = [False] * (self.num_vars + 1)
+        self.eliminated = [False] * (self.num_vars + 1)
+        self.fixed = []
+        self.elimination_stack = []
+        self.units = []
+        self.touched = []  # clauses to subsume with
+        self.unsat = False
+        self.proof = None
+        for var in frozen:
+            if var <= self.num_vars:
+                self.frozen[var] = True
+        for clause in clauses:
+            if not any(-lit in clause for lit in clause):
+                self.add(sorted(clause, key=abs))
+        self.proof = proof
+
+    def add(self, clause: List[int]):
+        if self.proof is not None:
+            self.proof.add(clause)
+        if not clause:
+            self.unsat = True
+            return
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.signatures.append(signature(clause))
+        for lit in clause:
+            self.occurrences[lit_index(lit)].add(index)
+        if len(clause) == 1:
+            self.units.append(clause[0])
+        self.touched.append(index)
+
+    def remove(self, index: int):
+        if self.proof is not None and len(self.clauses[index]) > 1:
+            self.proof.delete(self.clauses[index])
+        for lit in self.clauses[index]:
+            self.occurrences[lit_index(lit)].discard(index)
+        self.clauses[index] = None
+
+    def strengthen(self, index: int, lit: int):
+        """remove lit from clause index"""
+        clause = self.clauses[index]
+        if self.proof is not None:
+            self.proof.add([other for other in clause if other != lit])
+            if len(clause) > 1:
+                self.proof.delete(clause)
+        clause.remove(lit)
+        self.occurrences[lit_index(lit)].discard(index)
+        self.signatures[index] = signature(clause)
+        if not clause:
+            self.unsat = True
+        elif len(clause) == 1:
+            self.units.append(clause[0])
+        self.touched.append(index)
+
+    def propagate(self):
+        """fix unit literals, removing the clauses they satisfy and their negations from other clauses"""
+        while self.units and not self.unsat:
+            lit = self.units.pop()
+            var = abs(lit)
+            if self.values[var] * lit > 0:
+                continue
+            if self.values[var] * lit < 0:
+                self.unsat = True
+                return
+            self.values[var] = 1 if lit > 0 else -1
+            self.fixed.append(lit)
+            for index in list(self.occurrences[lit_index(lit)]):
+                self.remove(index)
+            for index in list(self.occurrences[lit_index(-lit)]):
+                self.strengthen(index, -lit)
+
+    def subsume(self, index: int):
+        """remove the clauses subsumed by clause index and strengthen those it self-subsumes"""
+        clause = self.clauses[index]
+        occurrences = self.occurrences
+        best = min(clause, key=lambda l: len(occurrences[lit_index(l)]) + len(occurrences[lit_index(-l)]))
+        sig = self.signatures[index]
+        for other in list(occurrences[lit_index(best)]) + list(occurrences[lit_index(-best)]):
+            other_clause = self.clauses[other]
+            if other == index or other_clause is None or len(other_clause) < len(clause) or \
+                    sig & ~self.signatures[other]:
+                continue
+            other_literals = set(other_clause)
+            flipped = 0
+            for lit in clause:
+                if lit in other_literals:
+                    continue
+                if flipped or -lit not in other_literals:
+                    break
+                flipped = -lit
+            else:
+                if flipped:
+                    self.strengthen(other, flipped)
+                else:
+                    self.remove(other)
+
+    def simplify(self):
+        """propagate units and subsume with touched clauses until nothing changes"""
+        while (self.units or self.touched) and not self.unsat:
+            self.propagate()
+            while self.touched and not self.unsat:
+                index = self.touched.pop()
+                if self.clauses[index] is not None:
+                    self.subsume(index)
+
+    def eliminate(self, var: int) -> bool:
+        """replace the clauses of var by their non tautological resolvents on var if there are no more of them,
+        return True if var was eliminated"""
+        positive = list(self.occurrences[lit_index(var)])
+        negative = list(self.occurrences[lit_index(-var)])
+        if positive and negative and len(positive) + len(negative) > OCCURRENCE_LIMIT:
+            return False
+        resolvents = []
+        for p in positive:
+            for n in negative:
+                resolvent = set(self.clauses[p])
+                resolvent.discard(var)
+                for lit in self.clauses[n]:
+                    if lit == -var:
+                        continue
+                    if -lit in resolvent:
+                        break
+                    resolvent.add(lit)
+                else:
+                    if len(resolvent) > RESOLVENT_LIMIT or len(resolvents) == len(positive) + len(negative):
+                        return False
+                    resolvents.append(sorted(resolvent, key=abs))
+        for resolvent in resolvents:
+            self.add(resolvent)
+        for pivot, indices in ((var, positive), (-var, negative)):
+            for index in indices:
+                self.elimination_stack.append((pivot, self.clauses[index]))
+                self.remove(index)
+        self.eliminated[var] = True
+        return True
+
+    def run(self) -> bool:
+        """simplify and eliminate variables, cheapest first. return False if the CNF is unsat"""
+        self.touched = [index for index in range(len(self.clauses)) if self.clauses[index] is not None]
+        self.simplify()
+        occurrences = self.occurrences
+        for _ in range(ELIMINATION_ROUNDS):
+            candidates = [var for var in range(1, self.num_vars + 1)
+                          if not self.frozen[var] and not self.eliminated[var] and not self.values[var]]
+            candidates.sort(key=lambda v: len(occurrences[lit_index(v)]) * len(occurrences[lit_index(-v)]))
+            eliminated = 0
+            for var in candidates:
+                if self.unsat:
+                    return False
+                if self.values[var] or not (occurrences[lit_index(var)] or occurrences[lit_index(-var)]):
+                    continue
+                if self.eliminate(var):
+                    eliminated += 1
+                    self.simplify()
+            if not eliminated:
+                break
+        return not self.unsat
+
+    def get_clauses(self) -> List[List[int]]:
+        """the simplified CNF, fixed literals included as unit clauses"""
+        return [[lit] for lit in self.fixed] + [clause for clause in self.clauses if clause is not None]
+
+    def get_eliminated(self) -> List[int]:
+        return [var for var in range(1, self.num_vars + 1) if self.eliminated[var]]
+
+    def extend_model(self, model: Dict[int, bool]) -> Dict[int, bool]:
+        """model of the input CNF from a model of the simplified one - eliminated variables start false, walk the
+        elimination stack back and set the pivot of every clause that is not satisfied yet"""
+        model = dict(model)
+        for lit in self.fixed:
+            model[abs(lit)] = lit > 0
+        for pivot, _ in self.elimination_stack:
+            model.setdefault(abs(pivot), False)
+        for pivot, clause in reversed(self.elimination_stack):
+            if not any(model.get(abs(lit)) == (lit > 0) for lit in clause):
+                model[abs(pivot)] = pivot > 0
+        return model
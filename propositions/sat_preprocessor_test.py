@@ -0,0 +1,73 @@
+import itertools
+
+from propositions.sat_preprocessor import Preprocessor
+from propositions.sat_solver import Sat_Solver, SAT_MSG, UNSAT_MSG
+from propositions.semantics import evaluate, is_satisfiable
+from propositions.syntax import Formula
+from solver import run_sat_solver
+
+
+def satisfies(model: dict, clauses: list) -> bool:
+    return all(any(model.get(abs(lit)) == (lit > 0) for lit in clause) for clause in clauses)
+
+
+def is_sat(clauses: list, num_vars: int) -> bool:
+    return any(satisfies(dict(zip(range(1, num_vars + 1), bits)), clauses)
+               for bits in itertools.product([False, True], repeat=num_vars))
+
+
+def test_subsumption(debug=False):
+    preprocessor = Preprocessor([[1, 2, 3], [1, 2], [-1, 2, 4], [1, 3, 4, 2]], frozen=[1, 2, 3, 4])
+    assert preprocessor.run()
+    clauses = sorted(sorted(clause) for clause in preprocessor.get_clauses())
+    if debug:
+        print(clauses)
+    # [1, 2] subsumes [1, 2, 3] and [1, 2, 3, 4], and strengthens [-1, 2, 4] to [2, 4]
+    assert clauses == [[1, 2], [2, 4]]
+
+    preprocessor = Preprocessor([[1, 2], [-1], [-2, 3], [-3, -2]], frozen=[1, 2, 3])
+    assert not preprocessor.run()
+
+
+def test_variable_elimination(debug=False):
+    # x4 <-> (x1 & x2), x5 <-> (x4 | x3) as in tseitin output, x5 asserted
+    clauses = [[-4, 1], [-4, 2], [4, -1, -2], [-5, 4, 3], [5, -4], [5, -3], [5]]
+    preprocessor = Preprocessor(clauses, frozen=[1, 2, 3])
+    assert preprocessor.run()
+    simplified = preprocessor.get_clauses()
+    if debug:
+        print(simplified, preprocessor.elimination_stack)
+    assert preprocessor.get_eliminated() == [4]
+    assert all(abs(lit) != 4 for clause in simplified for lit in clause)
+    assert sum(map(len, simplified)) < sum(map(len, clauses))
+    for bits in itertools.product([False, True], repeat=3):
+        model = dict(zip([1, 2, 3], bits))
+        if satisfies(model, simplified):
+            assert satisfies(preprocessor.extend_model(model), clauses)
+
+    clauses = [[1, 2, -3], [-1, 3], [-2, 3], [3, 4], [-4, -3, 1], [2, -4]]
+    for frozen in [[], [3], [1, 2]]:
+        preprocessor = Preprocessor(clauses, frozen)
+        assert preprocessor.run()
+        assert not any(preprocessor.eliminated[var] for var in frozen)
+        assert is_sat(preprocessor.get_clauses(), 4)
+
+
+def test_preprocessed_solve(debug=False):
+    formulas = ['((p|q)&(~p|r))', '((p<->q)&(q<->~p))', '(((p->q)&(q->r))&(p&~r))', '((p1<->(p2&p3))&(p1|~p3))']
+    for formula in formulas:
+        msg, model = run_sat_solver(formula)
+        if debug:
+            print(formula, msg, model)
+        assert (msg == SAT_MSG) == is_satisfiable(Formula.parse(formula))
+        if msg == SAT_MSG:
+            assert evaluate(Formula.parse(formula), model)
+
+    solver = Sat_Solver(clauses=[[1, 2], [-1, 3], [-2, 3], [-3, 4, 5], [-5, 1]])
+    assert solver.preprocess(frozen=[4])
+    msg, model = solver.solve(['~x4'])
+    assert msg == SAT_MSG and satisfies({int(name[1:]): value for name, value in model.items()},
+                                        [[1, 2], [-1, 3], [-2, 3], [-3, 4, 5], [-5, 1], [-4]])
+    solver = Sat_Solver(clauses=[[1, 2], [-1, 2], [1, -2], [-1, -2]])
+    assert not solver.preprocess()
+    assert solver.solve()[0] == UNSAT_MSG
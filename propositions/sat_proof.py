@@ -0,0 +1,89 @@
+"""Clausal proofs of unsatisfiability. DRAT lists the clauses the solver learns and deletes, a checker verifies
+every added clause by unit propagation. LRAT also numbers the clauses and gives the ids of the clauses unit
+propagation goes through (hints), so it is checked without search. Both come in the text and binary formats of
+drat-trim and lrat-check, and are written through a buffered stream as the solver runs."""
+from typing import BinaryIO, Iterable, Union
+
+BUFFER_SIZE = 1 << 20
+
+
+def encode_number(value: int, out: bytearray):
+    """binary proof number - 7 bits per byte, low bits first, the high bit set on all but the last byte"""
+    while value > 127:
+        out.append(value & 127 | 128)
+        value >>= 7
+    out.append(value)
+
+
+def encode_literal(lit: int, out: bytearray):
+    encode_number(2 * lit if lit > 0 else -2 * lit + 1, out)
+
+
+class Proof:
+    """
+    Proof writer for Sat_Solver(proof=...). Clause ids are shared between original clauses, which take 1..m in
+    input order as the checker numbers the CNF, and derived ones, so proofs are for clauses given before the first
+    solve(). Literals are in solver variable numbers - DIMACS ones for solvers built by read_dimacs.
+    """
+    def __init__(self, target: Union[str, BinaryIO], binary: bool = False, lrat: bool = False):
+        self.owner = isinstance(target, str)
+        self.stream = open(target, 'wb', buffering=BUFFER_SIZE) if self.owner else target
+        self.binary = binary
+        self.lrat = lrat
+        self.last_id = 0
+        self.added = 0
+        self.deleted = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def original(self) -> int:
+        """id of the next original clause"""
+        self.last_id += 1
+        return self.last_id
+
+    def add(self, literals: Iterable[int], hints: Iterable[int] = ()) -> int:
+        """write derived clause, with the ids of the clauses that derive it for LRAT. return its id"""
+        self.last_id += 1
+        self.added += 1
+        if self.binary:
+            out = bytearray(b'a')
+            if self.lrat:
+                encode_number(2 * self.last_id, out)
+            for lit in literals:
+                encode_literal(lit, out)
+            out.append(0)
+            if self.lrat:
+                for hint in hints:
+                    encode_literal(hint, out)
+                out.append(0)
+            self.stream.write(out)
+        elif self.lrat:
+            self.stream.write(('%d %s0 %s0\n' % (self.last_id, ''.join([str(lit) + ' ' for lit in literals]),
+                                                 ''.join([str(hint) + ' ' for hint in hints]))).encode())
+        else:
+            self.stream.write((''.join([str(lit) + ' ' for lit in literals]) + '0\n').encode())
+        return self.last_id
+
+    def delete(self, literals: Iterable[int], clause_id: int = 0):
+        """write deletion of clause, given by its literals for DRAT and by its id for LRAT"""
+        self.deleted += 1
+        if self.binary:
+            out = bytearray(b'd')
+            for value in ([clause_id] if self.lrat else literals):
+                encode_literal(value, out)
+            out.append(0)
+            self.stream.write(out)
+        elif self.lrat:
+            self.stream.write(('%d d %d 0\n' % (self.last_id, clause_id)).encode())
+        else:
+            self.stream.write(('d ' + ''.join([str(lit) + ' ' for lit in literals]) + '0\n').encode())
+
+    def close(self):
+        if self.owner:
+            self.stream.close()
+        else:
+            self.stream.flush()
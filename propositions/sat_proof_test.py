@@ -0,0 +1,118 @@
+import io
+
+from propositions.sat_proof import Proof, encode_literal
+from propositions.sat_solver import Sat_Solver, UNSAT_MSG
+from propositions.test_sat_algorithm import pigeonhole_clauses
+
+
+def propagates_to_conflict(clauses, values: dict) -> bool:
+    """unit propagate values over clauses, True on conflict"""
+    changed = True
+    while changed:
+        changed = False
+        for clause in clauses:
+            free = [lit for lit in clause if abs(lit) not in values]
+            if any(values.get(abs(lit)) == (lit > 0) for lit in clause):
+                continue
+            if not free:
+                return True
+            if len(free) == 1:
+                values[abs(free[0])] = free[0] > 0
+                changed = True
+    return False
+
+
+def check_drat(clauses, text: str) -> bool:
+    """forward check - every added clause is RUP, the empty clause is reached"""
+    db = [sorted(clause) for clause in clauses]
+    for line in text.splitlines():
+        tokens = line.split()
+        literals = sorted(int(token) for token in tokens[tokens[0] == 'd':-1])
+        if tokens[0] == 'd':
+            db.remove(literals)
+            continue
+        if not propagates_to_conflict(db, {abs(lit): lit < 0 for lit in literals}):
+            return False
+        if not literals:
+            return True
+        db.append(literals)
+    return False
+
+
+def check_lrat(clauses, text: str) -> bool:
+    """every hint is unit or the final conflict under the negated clause, the empty clause is reached"""
+    db = {i: clause for i, clause in enumerate(clauses, 1)}
+    for line in text.splitlines():
+        tokens = [int(token) if token != 'd' else token for token in line.split()]
+        if tokens[1] == 'd':
+            for clause_id in tokens[2:-1]:
+                del db[clause_id]
+            continue
+        zero = tokens.index(0)
+        clause_id, literals, hints = tokens[0], tokens[1:zero], tokens[zero + 1:-1]
+        values = {abs(lit): lit < 0 for lit in literals}
+        for hint in hints:
+            free = [lit for lit in db[hint] if abs(lit) not in values]
+            assert not any(values.get(abs(lit)) == (lit > 0) for lit in db[hint])
+            if not free:
+                break
+            assert len(free) == 1
+            values[abs(free[0])] = free[0] > 0
+        else:
+            return False
+        if not literals:
+            return True
+        db[clause_id] = literals
+    return False
+
+
+def test_drat(debug=False):
+    clauses = pigeonhole_clauses(4)
+    stream = io.BytesIO()
+    solver = Sat_Solver(clauses=clauses, proof=Proof(stream))
+    assert solver.solve() == (UNSAT_MSG, None)
+    text = stream.getvalue().decode()
+    if debug:
+        print(text)
+    assert check_drat(clauses, text)
+
+    # preprocessing and inprocessing steps are logged too
+    stream = io.BytesIO()
+    solver = Sat_Solver(clauses=clauses, proof=Proof(stream))
+    solver.preprocess()
+    solver.inprocess()
+    assert solver.solve() == (UNSAT_MSG, None)
+    assert check_drat(clauses, stream.getvalue().decode())
+
+    out = bytearray()
+    encode_literal(-63, out)
+    encode_literal(100, out)
+    assert out == bytearray([127, 200, 1])
+    stream = io.BytesIO()
+    proof = Proof(stream, binary=True)
+    proof.add([1, -2])
+    proof.delete([1, -2])
+    assert stream.getvalue() == bytes([ord('a'), 2, 5, 0, ord('d'), 2, 5, 0])
+
+
+def test_lrat(debug=False):
+    clauses = pigeonhole_clauses(4)
+    stream = io.BytesIO()
+    solver = Sat_Solver(clauses=clauses, proof=Proof(stream, lrat=True))
+    assert not solver.inprocessing
+    assert solver.solve() == (UNSAT_MSG, None)
+    text = stream.getvalue().decode()
+    if debug:
+        print(text)
+    assert check_lrat(clauses, text)
+    try:
+        Sat_Solver(clauses=clauses, proof=Proof(io.BytesIO(), lrat=True)).preprocess()
+        assert False, 'Expected exception'
+    except ValueError:
+        pass
+
+    # level 0 units are derived with their own ids
+    clauses = [[1], [-1, 2], [-2, 3], [-3, -1, 4], [-4, -2]]
+    stream = io.BytesIO()
+    assert Sat_Solver(clauses=clauses, proof=Proof(stream, lrat=True)).solve() == (UNSAT_MSG, None)
+    assert check_lrat(clauses, stream.getvalue().decode())
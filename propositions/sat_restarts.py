@@ -0,0 +1,111 @@
+"""Restart policies for the sat solver. A policy is told about every conflict (with the LBD of the learned clause)
+and about every restart, and answers should_restart() once propagation at the new level is done."""
+
+
+def luby(i: int) -> int:
+    """i-th element (starting at 1) of the luby sequence 1,1,2,1,1,2,4,1,1,2,1,1,2,4,8,..."""
+    i -= 1
+    size, power = 1, 0
+    while size < i + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        power -= 1
+        i = i % size
+    return 1 << power
+
+
+class NoRestarts:
+    def on_conflict(self, lbd: int):
+        pass
+
+    def should_restart(self) -> bool:
+        return False
+
+    def on_restart(self):
+        pass
+
+
+class LubyRestarts:
+    """restart after unit * luby(i) conflicts"""
+
+    def __init__(self, unit: int = 100):
+        self.unit = unit
+        self.restarts = 0
+        self.conflicts = 0
+        self.limit = unit * luby(1)
+
+    def on_conflict(self, lbd: int):
+        self.conflicts += 1
+
+    def should_restart(self) -> bool:
+        return self.conflicts >= self.limit
+
+    def on_restart(self):
+        self.restarts += 1
+        self.conflicts = 0
+        self.limit = self.unit * luby(self.restarts + 1)
+
+
+class GeometricRestarts:
+    """restart after first, first * factor, first * factor^2, ... conflicts"""
+
+    def __init__(self, first: int = 100, factor: float = 1.5):
+        self.factor = factor
+        self.conflicts = 0
+        self.limit = first
+
+    def on_conflict(self, lbd: int):
+        self.conflicts += 1
+
+    def should_restart(self) -> bool:
+        return self.conflicts >= self.limit
+
+    def on_restart(self):
+        self.conflicts = 0
+        self.limit *= self.factor
+
+
+class GlucoseRestarts:
+    """glucose style dynamic restarts - restart when the recent learned clauses are worse than the average, that is
+    when the fast moving average of LBD is above margin times the slow one"""
+
+    def __init__(self, fast: float = 1 / 32, slow: float = 1 / 4096, margin: float = 1.25,
+                 min_conflicts: int = 50):
+        self.fast_decay = fast
+        self.slow_decay = slow
+        self.margin = margin
+        self.min_conflicts = min_conflicts
+        self.fast = 0.0
+        self.slow = 0.0
+        self.total = 0
+        self.conflicts = 0
+
+    def on_conflict(self, lbd: int):
+        self.total += 1
+        self.conflicts += 1
+        # bias corrected for the first conflicts, the averages start as plain means
+        self.fast += (lbd - self.fast) * max(self.fast_decay, 1 / self.total)
+        self.slow += (lbd - self.slow) * max(self.slow_decay, 1 / self.total)
+
+    def should_restart(self) -> bool:
+        return self.conflicts >= self.min_conflicts and self.fast > self.margin * self.slow
+
+    def on_restart(self):
+        self.conflicts = 0
+
+
+RESTART_POLICIES = {
+    'none': NoRestarts,
+    'luby': LubyRestarts,
+    'geometric': GeometricRestarts,
+    'glucose': GlucoseRestarts,
+}
+
+
+def make_restart_policy(policy):
+    """policy name from RESTART_POLICIES or a policy object"""
+    if isinstance(policy, str):
+        return RESTART_POLICIES[policy]()
+    return policy
@@ -0,0 +1,94 @@
+"""Learned clause exchange between solver processes through shared memory, without pickling.
+Every worker owns a ring buffer of int32 words it alone writes clauses to as [size, lbd, literal, ...] records.
+Two int64 headers count the words of each ring - the words reserved, published before a record is written, and
+the words written, published after it is in place. Readers keep their own position in each ring. A reader that
+was lapped by the writer skips what it missed, records that may have been overwritten while being read, by
+the record being written included, are dropped."""
+from multiprocessing import shared_memory
+from typing import Iterator, List, Tuple, Union
+
+RING_CAPACITY = 1 << 16  # int32 words per worker ring
+EXPORT_SIZE = 16  # longest learned clause exported
+EXPORT_LBD = 4  # highest LBD of an exported clause
+INT_SIZE = 4
+POSITION_SIZE = 8
+
+
+class ClauseExchange:
+    """
+    Shared memory block holding a ring per worker. The creating process owns the block and unlinks it, workers
+    get it as a process argument - under fork it is inherited as is, otherwise it is attached again by name.
+    index is the ring this process writes to, None in the creating process.
+    """
+    def __init__(self, workers: int, capacity: int = RING_CAPACITY, name: Union[str, None] = None):
+        self.workers = workers
+        self.capacity = capacity
+        self.index = None
+        size = workers * (2 * POSITION_SIZE + capacity * INT_SIZE)
+        self.memory = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self.owner = name is None
+        self._map()
+
+    def _map(self):
+        buffer = self.memory.buf
+        header = self.workers * POSITION_SIZE
+        self.positions = buffer[:header].cast('q')
+        self.reserved = buffer[header:2 * header].cast('q')
+        header *= 2
+        self.data = buffer[header:header + self.workers * self.capacity * INT_SIZE].cast('i')
+        self.read = [0] * self.workers  # words of each ring read by this process
+        self.written = 0
+
+    def __getstate__(self):
+        return self.workers, self.capacity, self.memory.name, self.index
+
+    def __setstate__(self, state):
+        self.workers, self.capacity, name, self.index = state
+        self.memory = shared_memory.SharedMemory(name=name)
+        self.owner = False
+        self._map()
+
+    def export(self, literals: List[int], lbd: int):
+        """append clause to this process' ring"""
+        data, capacity = self.data, self.capacity
+        base = self.index * capacity
+        position = self.written
+        self.reserved[self.index] = position + 2 + len(literals)
+        data[base + position % capacity] = len(literals)
+        data[base + (position + 1) % capacity] = lbd
+        for k, lit in enumerate(literals, position + 2):
+            data[base + k % capacity] = lit
+        self.written = position + 2 + len(literals)
+        self.positions[self.index] = self.written
+
+    def imports(self) -> Iterator[Tuple[List[int], int]]:
+        """(literals, lbd) of the clauses other processes exported since the last call"""
+        data, capacity = self.data, self.capacity
+        for ring in range(self.workers):
+            if ring == self.index:
+                continue
+            end = self.positions[ring]
+            start = self.read[ring]
+            self.read[ring] = end
+            if self.reserved[ring] - start > capacity:  # lapped
+                continue
+            base = ring * capacity
+            if start % capacity + (end - start) <= capacity:
+                words = data[base + start % capacity:base + start % capacity + end - start].tolist()
+            else:
+                words = [data[base + k % capacity] for k in range(start, end)]
+            if self.reserved[ring] - start > capacity:  # overwritten while reading
+                continue
+            k = 0
+            while k < len(words):
+                size = words[k]
+                yield words[k + 2:k + 2 + size], words[k + 1]
+                k += 2 + size
+
+    def close(self):
+        self.positions.release()
+        self.reserved.release()
+        self.data.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
@@ -1,156 +1,664 @@
 from propositions.sat_helper import *
+from propositions.sat_restarts import make_restart_policy
+from propositions.sat_preprocessor import Preprocessor
+from propositions.sat_proof import Proof
+from propositions.sat_sharing import EXPORT_LBD, EXPORT_SIZE
+from propositions.sat_walk import walk
 import random
+import time
+from typing import Callable
 
 SAT_MSG = "SAT "
 UNSAT_MSG = "UNSAT "
 BACKTRACK_MSG = "Post Backtrack "
+UNKNOWN_MSG = "UNKNOWN "
+
+# learned clause db reduction
+CORE_LBD = 2  # learned clauses with LBD up to this are never deleted
+TIER2_LBD = 6  # learned clauses with LBD up to this are kept while they take part in conflicts
+FIRST_REDUCE = 2000  # conflicts before first reduction
+REDUCE_INCREMENT = 300  # growth of the interval between reductions
+CLAUSE_DECAY = 0.999
+POLARITIES = ('watch', 'true', 'false', 'random')
+
+# inprocessing
+INPROCESS_INTERVAL = 5000  # conflicts between inprocessing passes
+PROBE_BUDGET = 100000  # assignments made by failed literal probing in one pass
+HBR_LIMIT = 1000  # hyper binary resolvents learned in one pass
+
+# phases and backtracking
+REPHASE_INTERVAL = 1000  # conflicts before the first rephase, the n-th comes n intervals after the one before
+REPHASES = ('best', 'walk', 'best', 'original', 'best', 'inverted', 'best', 'random')
+CHRONO_THRESHOLD = 100  # usual chrono_threshold, backjumps over more levels go back one level only
+
+# statistics
+PROGRESS_INTERVAL = 1000  # conflicts between progress callbacks
+PHASES = {'propagate': 'propagate', 'analyze': 'get_conflict_clause', 'decide': 'decide', 'backtrack': 'backtrack'}
+
+
+def timed(method: Callable, phase: str, timers: {str: float}, recorded: List[float]) -> Callable:
+    """method adding its run time to timers[phase], less the time of timed methods it calls. recorded[0] is the
+    time recorded by all timers so far"""
+    def timed_method(*args, **kwargs):
+        start, before = time.perf_counter(), recorded[0]
+        try:
+            return method(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            timers[phase] += elapsed - (recorded[0] - before)
+            recorded[0] = before + elapsed
+    return timed_method
+
 
 class Sat_Solver:
+    """CDCL solver over int variables. Variable names are mapped once to 1..n at construction, literals are
+    signed ints and per variable state (value, level, reason) is held in flat lists indexed by variable"""
 
-    VSIDS_dict: {str, int}
-    assignment_dict: {}  # T,F, None
-    decision_level_history: {int: DecisionLevel}
+    var_names: [str]  # var_names[v] is the name of variable v, index 0 unused
+    var_ids: {str: int}
+    values: [int]  # TRUE, FALSE, UNASSIGNED
+    levels: [int]
+    reasons: [int]  # cref of reason clause, None for decisions
+    VSIDS_heap: VariableHeap
+    trail: [int]  # assigned literals in assignment order
+    trail_lim: [int]  # trail_lim[i] is the trail index where level i + 1 starts
 
-    def __init__(self, cnf_formula: Formula):
+    def __init__(self, cnf_formula: Union[Formula, None] = None, restart_policy='glucose',
+                 clauses: Union[Iterable[Iterable[Union[str, int]]], None] = None, inprocessing: bool = True,
+                 polarity: str = 'watch', seed: Union[int, None] = None, proof: Union[Proof, None] = None,
+                 timers: bool = False, progress: Union[Callable[[dict], None], None] = None,
+                 progress_interval: int = PROGRESS_INTERVAL, chrono_threshold: Union[int, None] = None):
         self.formula = cnf_formula
-        self.variables = cnf_formula.variables()
-        self.wv_db = WatchVariableDb(self.variables)
-        self.VSIDS_dict = {}
-        for variable in self.variables:
-            self.VSIDS_dict[variable] = 0
-
-        self.assignment_dict = dict.fromkeys(list(self.variables), )
-        self.nodes = dict((k, ImplicationNode(k, None)) for k in list(self.variables))  # {var : node}
-        self.level = 0
-        self.decision_level_history = {self.level: DecisionLevel('start')}
+        self.var_names = [None]
+        self.var_ids = {}
+        self.num_vars = 0
 
-        # unit clauses to propagate by level
-        self.l0_unit_clauses = [] # tuple of level unit clauses with itself for propagation
-        self.li_unit_clauses = {} # {int: units}
+        self.values = [UNASSIGNED]
+        self.levels = [-1]
+        self.reasons = [None]
+        self.seen = [False]  # conflict analysis markers
+        self.saved_phases = [UNASSIGNED]  # last value of each variable, reused on decide
+        # phases of the longest conflict free trail since the last restart (target) and since the last rephase
+        # (best), with the number of variables assigned on it. decide prefers the target phase to the saved one
+        self.target_phases = [UNASSIGNED]
+        self.best_phases = [UNASSIGNED]
+        self.target_assigned = self.best_assigned = 0
+        self.rephases = 0
+        self.next_rephase = REPHASE_INTERVAL
+        self.VSIDS_heap = VariableHeap(0)
+        self.clause_db = ClauseArena()
+        self.wv_db = WatchVariableDb(0)
+        self.restart_policy = make_restart_policy(restart_policy)
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0  # assignments made by unit propagation
+        self.restarts = 0
+        # limits of the current solve() call, checked before every decision. interrupt() may be called from
+        # another thread, setting a bool is atomic
+        self.conflict_budget = self.propagation_budget = self.deadline = float('inf')
+        self.interrupted = False
+        self.learned_clauses = []  # crefs of learned clauses of size > 1
+        self.clause_bump = 1.0
+        self.reduce_interval = FIRST_REDUCE
+        self.next_reduce = FIRST_REDUCE
+        self.learned = 0  # conflict clauses learned, units included
+        self.deleted_clauses = 0
+        self.assumptions = []  # literals decided first, one per level, by solve()
+        self.level = 0
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0  # trail index of the next assignment to propagate
+        # chronological backtracking - a backjump over more than chrono_threshold levels backtracks one level
+        # instead, None always backjumps. The trail is then out of order: implied literals take the highest level
+        # of their reason's other literals, which may be below the current level, and backtracking keeps them
+        self.chrono_threshold = chrono_threshold
+        self.has_empty_clause = False
+        self.bulk_loading = False  # heap order is restored once loading ends
+        self.preprocessor = None  # extends models to variables eliminated by preprocess()
+        self.inprocessing = inprocessing
+        self.next_inprocess = 0
+        self.representatives = [0]  # literal a variable was substituted by, 0 if it was not
+        self.substituted = 0
+        # polarity of variables without a target or saved phase, also the original phase of rephasing - 'watch'
+        # (the more watched literal), 'true', 'false' or 'random'. With a seed the initial activities are slightly
+        # randomized
+        assert polarity in POLARITIES
+        self.polarity = polarity
+        self.seed = seed
+        self.random = random.Random(0 if seed is None else seed)  # fixed by default so runs are reproducible
+        self.randomized_vars = 0
+        self.exchange = None  # ClauseExchange of a parallel portfolio, learned clauses are shared through it
+        self.eliminated = set()
+        # DRAT or LRAT proof of unsatisfiability. LRAT needs the derivation of every clause and level 0 units in
+        # trail order, so inprocessing, preprocessing, clause import and chronological backtracking are off
+        self.proof = proof
+        self.proof_ids = []  # proof id of the clause of each cref
+        self.unit_ids = {}  # LRAT id of the unit clause of each level 0 variable
+        self.logged_units = 0  # level 0 trail assignments with unit ids
+        self.conflict_cref = None  # clause of the last conflict analyzed
+        if proof is not None and proof.lrat:
+            self.inprocessing = False
+            self.chrono_threshold = None
+        # statistics - timers of the search phases, and progress(statistics) called every progress_interval
+        # conflicts. Timed phase methods are wrapped on this instance only, the class methods stay as they are
+        self.lbd_sum = 0
+        self.seconds = 0.0  # time spent in solve() calls that returned
+        self.solve_start = None  # start of the running solve() call
+        self.timers = None
+        if timers:
+            self.timers = dict.fromkeys(PHASES, 0.0)
+            recorded = [0.0]
+            for phase, name in PHASES.items():
+                setattr(self, name, timed(getattr(self, name), phase, self.timers, recorded))
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.next_progress = progress_interval if progress is not None else float('inf')
 
         # insert clauses
-        clauses = Formula.get_clauses(cnf_formula)
-        for clause in clauses:
-            current_clause = Clause(clause)
-            self.add_clause_to_db(current_clause)
-
-
-    def add_clause_to_db(self, current_clause: Clause):
-        """add clauses to wv db at l0"""
-        for var in current_clause.get_variables():
-            self.VSIDS_dict[var] += 1
-        self.wv_db.insert_clause_wv_to_wvdict(current_clause, current_clause.get_wv1())
-        if not current_clause.is_unit_clause():
-            self.wv_db.insert_clause_wv_to_wvdict(current_clause, current_clause.get_wv2())
-        else:
-            self.l0_unit_clauses.append(
-                tuple([current_clause, None]))  # to be dealt with in start_sat() - edge case for convenience
-
-    def add_conflict_clause_to_db(self, current_clause: Clause):
-        """add conflict clause to db and update vsids dict"""
-        for key in self.VSIDS_dict.keys():
-            self.VSIDS_dict[key] /=2
-        for var in current_clause.get_variables():
-            self.VSIDS_dict[var] += 1
-        self.wv_db.insert_clause_wv_to_wvdict(current_clause, current_clause.get_wv1())
-        if not current_clause.is_unit_clause():
-            self.wv_db.insert_clause_wv_to_wvdict(current_clause, current_clause.get_wv2())
-
-    def update_graph(self, var: str, clause: Union[Clause, None] = None):
-        """add node to implication graph"""
-        node = self.nodes[var]
-        node.value = self.assignment_dict[var]
-        node.level = self.level
-
-        # update parents
-        if clause:  # clause is None means parent does not exist
-            for v in clause.get_variables():
-                if v != var:
-                    node.parents.append(self.nodes[v])
-                    self.nodes[v].children.append(node)
-            node.clause = clause
+        if cnf_formula is not None:
+            for name in sorted(cnf_formula.variables()):
+                self.new_variable(name)
+            self.add_formula(cnf_formula)
+        if clauses is not None:
+            self.add_clauses(clauses)
 
-    def start_sat(self):
-        """l0 unit propagate"""
-        for clause, implication in self.l0_unit_clauses:
-            wv = clause.get_wv1()
-            if self.assignment_dict[wv] is None:
-                self.add_lit_assignment(wv, clause, implication)
-                l1 = self.propagate_l0(wv)
-                if l1 is False:
-                    return UNSAT_MSG, None
-
-            elif self.assignment_dict[wv] == clause.is_positive_variable(wv):
+    def new_variable(self, name: str) -> int:
+        """add variable, return its int"""
+        self.num_vars += 1
+        var = self.num_vars
+        self.var_names.append(name)
+        self.var_ids[name] = var
+        self.values.append(UNASSIGNED)
+        self.levels.append(-1)
+        self.reasons.append(None)
+        self.seen.append(False)
+        self.saved_phases.append(UNASSIGNED)
+        self.target_phases.append(UNASSIGNED)
+        self.best_phases.append(UNASSIGNED)
+        self.representatives.append(0)
+        self.VSIDS_heap.add_variable()
+        self.wv_db.add_variable()
+        return var
+
+    def add_formula(self, cnf_formula: Formula):
+        """add clauses of CNF formula, may be called between calls to solve()"""
+        for clause in Formula.get_clauses(cnf_formula):
+            self.add_clause(clause)
+
+    def add_clause(self, clause: Tuple[List[str], List[str]]):
+        """add clause given as (positive names, negative names), may be called between calls to solve()"""
+        clause_id = self.proof.original() if self.proof is not None else 0
+        for name in [*clause[0], *clause[1]]:
+            if name not in self.var_ids and not is_constant(name):
+                self.new_variable(name)
+        literals = self.clause_to_literals(clause)
+        if literals is not None:
+            self.add_clause_to_db(literals, clause_id)
+
+    def add_clauses(self, clauses: Iterable[Iterable[Union[str, int]]]):
+        """add clauses given as iterables of literals - names, '~name', constants T, F, ~T, ~F or int literals,
+        may be called between calls to solve()"""
+        self.add_int_clauses(literals for literals in map(self.to_int_clause, clauses) if literals is not None)
+
+    def to_int_clause(self, clause: Iterable[Union[str, int]]) -> Union[List[int], None]:
+        """int literals of clause, new variables are added. return None if clause holds a true constant"""
+        literals = []
+        for literal in clause:
+            if literal in ('T', 'F', '~T', '~F'):
+                if literal == 'T' or literal == '~F':
+                    return None
                 continue
-            else:
-                return UNSAT_MSG, None
+            literals.append(self.to_internal_literal(literal))
+        return literals
 
-        return True, None
+    def add_int_clause(self, literals: List[int]):
+        """add clause of int literals of existing variables, duplicate literals and tautologies are dropped"""
+        clause_id = self.proof.original() if self.proof is not None else 0
+        clause = set(literals)
+        for lit in clause:
+            if -lit in clause:
+                return
+        self.add_clause_to_db(sorted(clause, key=abs), clause_id)
 
-    def propagate_l0(self, unit_variable: str): # x,y (~x|~y)
-        illegal_setting = not self.assignment_dict[unit_variable]
+    def add_int_clauses(self, clauses: Iterable[List[int]]):
+        """add clauses of int literals in bulk - input clause bumps go to the activities directly and the VSIDS
+        heap is rebuilt once at the end"""
+        self.bulk_loading = True
+        try:
+            for clause in clauses:
+                self.add_int_clause(clause)
+        finally:
+            self.bulk_loading = False
+            self.VSIDS_heap.rebuild()
 
-        clauses_to_update = self.wv_db.get_clauses_to_be_fixed(unit_variable, illegal_setting)
-        for clause in clauses_to_update:
-            if clause.is_unit_clause():  # l0 is false, other cases resolve
-                return False
+    def to_internal_literal(self, literal: Union[str, int]) -> int:
+        """int literal of variable name, '~name' for negation. int literals are returned as is, missing variables
+        up to them are added named x<var>"""
+        if isinstance(literal, int):
+            assert literal != 0
+            for var in range(self.num_vars + 1, abs(literal) + 1):
+                if 'x' + str(var) in self.var_ids:
+                    raise ValueError('variable name x' + str(var) + ' is taken by variable ' +
+                                     str(self.var_ids['x' + str(var)]))
+                self.new_variable('x' + str(var))
+            return literal
+        negated = literal.startswith('~')
+        name = literal[1:] if negated else literal
+        var = self.var_ids[name] if name in self.var_ids else self.new_variable(name)
+        return -var if negated else var
 
-            status = clause.find_legal_wv(unit_variable, self.assignment_dict)
-            if status[0] is True and status[1] is None: # already true case
-                self.wv_db.insert_clause_wv_to_wvdict(clause, unit_variable)
-            elif status[1] is None:  # non unit new wv case
-                self.wv_db.insert_clause_wv_to_wvdict(clause, status[0])
-            elif status[1] is True: # newly unit case
-                self.l0_unit_clauses.append(tuple([clause, clause]))
-            elif status[1] is False:  # contradiction case
-                self.wv_db.insert_clause_wv_to_wvdict(clause, unit_variable)
-                return False  # at l0 false, other levels resolve
-        return True
+    @property
+    def assignment_dict(self) -> {str: Union[bool, None]}:
+        """assignment by variable name - T,F, None"""
+        return {self.var_names[var]: None if value == UNASSIGNED else value == TRUE
+                for var, value in enumerate(self.values) if var}
+
+    def clause_to_literals(self, clause: Tuple[List[str], List[str]]) -> Union[List[int], None]:
+        """map clause given as (positive names, negative names) to int literals,
+        return None if clause is trivially true"""
+        literals = set()
+        for name in clause[0]:
+            if name == 'T':
+                return None
+            if name != 'F':
+                literals.add(self.var_ids[name])
+        for name in clause[1]:
+            if name == 'F':
+                return None
+            if name != 'T':
+                literals.add(-self.var_ids[name])
+        for lit in literals:
+            if -lit in literals:
+                return None
+        return sorted(literals, key=abs)
+
+    def to_literal(self, name: str) -> int:
+        """current true literal of assigned variable name"""
+        var = self.var_ids[name]
+        return var if self.values[var] == TRUE else -var
+
+    def add_clause_to_db(self, literals: List[int], clause_id: int = 0):
+        """add clauses to clause db and wv db at l0, duplicates are dropped. Literals set at level 0 are
+        simplified away. clause_id is the proof id of the original clause"""
+        if self.level > 0:
+            self.cancel_until(0)
+        if self.substituted:
+            literals = set(map(self.representative, literals))
+            if any(-lit in literals for lit in literals):
+                return
+            literals = list(literals)
+        if self.qhead:  # level 0 was propagated, clauses added before are fixed by propagating the trail
+            values = self.values
+            if any(values[abs(lit)] * lit > 0 for lit in literals):
+                return
+            literals = [lit for lit in literals if values[abs(lit)] == UNASSIGNED]
+        if not literals:
+            self.derive_empty_clause()
+            return
+        cref = self.clause_db.add_original(literals)
+        if cref is None:
+            return
+        if clause_id:
+            self.set_proof_id(cref, clause_id)
+        if self.bulk_loading:
+            activity, increment = self.VSIDS_heap.activity, self.VSIDS_heap.bump_increment
+            for lit in literals:
+                activity[abs(lit)] += increment
+        else:
+            for lit in literals:
+                self.VSIDS_heap.bump(abs(lit))
+        if len(literals) == 1:
+            value = self.values[abs(literals[0])] * literals[0]
+            if value == UNASSIGNED:
+                self.add_lit_assignment(literals[0], cref)  # propagated by start_sat()
+            elif value < 0:
+                self.derive_empty_clause(cref)
+        else:
+            self.attach_clause(cref, literals)
+
+    def add_conflict_clause_to_db(self, current_clause: Clause, lbd: int = 0) -> int:
+        """add conflict clause to db and update vsids scores, return its cref"""
+        literals = current_clause.literals
+        cref = self.clause_db.add(literals, current_clause.hash, learned=True, lbd=lbd)
+        self.learned += 1
+        if len(literals) > 1:
+            self.learned_clauses.append(cref)
+        for lit in literals:
+            self.VSIDS_heap.bump(abs(lit))
+        self.VSIDS_heap.decay_activities()
+        self.attach_clause(cref, literals)
+        return cref
+
+    def set_proof_id(self, cref: int, clause_id: int):
+        ids = self.proof_ids
+        if cref >= len(ids):
+            ids.extend([0] * (cref + 1 - len(ids)))
+        ids[cref] = clause_id
+
+    def derive_empty_clause(self, conflict_cref: Union[int, None] = None):
+        """the formula is unsat, by a level 0 conflict on conflict_cref if given. return (UNSAT_MSG, None)"""
+        self.has_empty_clause = True
+        if self.proof is not None:
+            lrat = self.proof.lrat and conflict_cref is not None
+            if lrat:
+                self.log_root_units()
+            self.proof.add([], self.derivation_hints(conflict_cref, ()) if lrat else ())
+        return UNSAT_MSG, None
+
+    def log_root_units(self):
+        """derive the LRAT unit clauses of the level 0 assignments that have none yet, in trail order"""
+        end = self.trail_lim[0] if self.trail_lim else len(self.trail)
+        sizes, reasons = self.clause_db.sizes, self.reasons
+        for lit in self.trail[self.logged_units:end]:
+            reason = reasons[abs(lit)]
+            self.unit_ids[abs(lit)] = self.proof_ids[reason] if sizes[reason] == 1 else \
+                self.proof.add([lit], self.derivation_hints(reason, [lit]))
+        self.logged_units = end
+
+    def derivation_hints(self, conflict_cref: int, clause: Iterable[int]) -> List[int]:
+        """LRAT hints of clause, derived from the conflict on conflict_cref while its literals are still false -
+        the unit ids of the level 0 variables met, then the ids of the reasons met going back from the conflict to
+        the clause, each after the reasons of its own literals, then the id of the conflict clause"""
+        levels, reasons, ids = self.levels, self.reasons, self.proof_ids
+        arena, offsets, sizes = self.clause_db.literals, self.clause_db.offsets, self.clause_db.sizes
+        done = set(abs(lit) for lit in clause)
+        units, chain = [], []
+        stack = list(arena[offsets[conflict_cref]:offsets[conflict_cref] + sizes[conflict_cref]])
+        while stack:
+            lit = stack.pop()
+            if lit == 0:  # the reasons of var's literals are in, var's reason follows them
+                chain.append(ids[reasons[stack.pop()]])
+                continue
+            var = lit if lit > 0 else -lit
+            if var in done:
+                continue
+            done.add(var)
+            if levels[var] == 0:
+                units.append(self.unit_ids[var])
+                continue
+            reason = reasons[var]
+            stack.append(var)
+            stack.append(0)
+            stack.extend(arena[offsets[reason]:offsets[reason] + sizes[reason]])
+        return units + chain + [ids[conflict_cref]]
+
+    def attach_clause(self, cref: int, literals: List[int]):
+        """watch stored clause, its watch literals are literals[0] and literals[1]. unit clauses are not watched"""
+        if len(literals) == 2:
+            self.wv_db.insert_binary_clause(cref, literals[0], literals[1])
+        elif len(literals) > 2:
+            self.wv_db.insert_clause_to_wv_db_l0(cref, literals[0], literals[1])
+
+    def update_graph(self, var: int, clause: Union[int, None] = None):
+        """add node to the implication graph, which is kept implicitly - the parents of var are the other
+        variables of its reason clause (None for decisions)"""
+        self.levels[var] = self.level
+        self.reasons[var] = clause
+
+    def start_sat(self):
+        """l0 unit propagate, a conflict here makes the formula unsat for good"""
+        if self.has_empty_clause:
+            return UNSAT_MSG, None
+        conflict = self.propagate_s2()
+        if conflict is not True:
+            return self.derive_empty_clause(conflict)
+        if self.proof is not None and self.proof.lrat:
+            self.log_root_units()
+        return True, None
 
     def decide(self):
-        """decide new var,
-        -return decision variable if found
+        """decide new var, assumptions are decided first, each on its own level (an empty level if it already
+        holds)
+        -return decision variable name if found
         -else; return sat with assignments
+        -return (unsat, failed assumptions) if an assumption is false
         """
-        self.level += 1
-        self.li_unit_clauses[self.level] = []
+        self.new_decision_level()
+        while self.level <= len(self.assumptions):
+            assumption = self.assumptions[self.level - 1]
+            value = self.values[abs(assumption)] * assumption
+            if value == UNASSIGNED:
+                return self.decide_literal(assumption), None
+            if value < 0:
+                self.cancel_until(self.level - 1)
+                return UNSAT_MSG, self.analyze_final(assumption)
+            self.new_decision_level()
+
         decision_variable = self.__largest_available_vsids_member()
         if decision_variable is True:
+            self.cancel_until(self.level - 1)
             return SAT_MSG, self.assignment_dict
-        if self.wv_db.positive_len(decision_variable) > self.wv_db.negative_len(decision_variable):
-            decision = True
-        else:
-            decision = False
-        # decision = random.sample([True, False], 1)[0]
-        # decision=True
+        decision = self.target_phases[decision_variable] or self.saved_phases[decision_variable] or \
+            self.initial_phase(decision_variable)
+        return self.decide_literal(decision_variable if decision == TRUE else -decision_variable), None
+
+    def initial_phase(self, var: int) -> int:
+        """phase of var by the polarity rule"""
+        if self.polarity == 'watch':
+            return TRUE if self.wv_db.positive_len(var) > self.wv_db.negative_len(var) else FALSE
+        if self.polarity == 'random':
+            return self.random.choice((TRUE, FALSE))
+        return TRUE if self.polarity == 'true' else FALSE
+
+    def new_decision_level(self):
+        self.trail_lim.append(len(self.trail))
+        self.level += 1
+
+    def decide_literal(self, lit: int) -> str:
+        """set lit as decision of the current level, return its variable name"""
+        self.add_lit_assignment(lit, None)
+        return self.var_names[abs(lit)]
+
+    def solve(self, assumptions: Iterable[Union[str, int]] = (), shrink_core: bool = False,
+              conflict_limit: Union[int, None] = None, propagation_limit: Union[int, None] = None,
+              time_limit: Union[float, None] = None):
+        """run the cdcl search from level 0 under assumptions (names, '~name' or int literals). Clauses may be
+        added between calls, learned clauses and heuristic state are kept across calls
+        - return (SAT_MSG, assignments) if satisfiable
+        - return (UNSAT_MSG, None) if unsat and no assumptions were given
+        - return (UNSAT_MSG, core) if unsat under the assumptions, core is the list of assumptions (as given) in
+        the final conflict, empty if the formula is unsat by itself. With shrink_core the core is made minimal -
+        dropping any of its assumptions makes the formula sat - unless a limit is reached while shrinking
+        - return (UNKNOWN_MSG, statistics) if the conflicts, propagations or seconds of this call reached their
+        limit, or interrupt() was called, before an answer
+        """
+        start = self.solve_start = time.monotonic()
+        unlimited = float('inf')
+        self.conflict_budget = unlimited if conflict_limit is None else self.conflicts + conflict_limit
+        self.propagation_budget = unlimited if propagation_limit is None else self.propagations + propagation_limit
+        self.deadline = unlimited if time_limit is None else start + time_limit
+        try:
+            msg, result = self.__solve(list(assumptions), shrink_core)
+        finally:
+            self.conflict_budget = self.propagation_budget = self.deadline = unlimited
+            self.interrupted = False
+            self.seconds += time.monotonic() - start
+            self.solve_start = None
+        if msg == UNKNOWN_MSG:
+            result = self.statistics
+        return msg, result
+
+    def interrupt(self):
+        """stop the running solve() call, or the next one, at its next decision or conflict - it returns
+        UNKNOWN_MSG. Safe to call from another thread"""
+        self.interrupted = True
+
+    @property
+    def statistics(self) -> {str: Union[int, float, dict]}:
+        """counters since the solver was built - search events, conflict clauses learned and learned clauses deleted
+        by reduce_db(), learned clauses of size > 1 currently kept, average LBD of learned clauses, seconds in solve()
+        and, with timers, seconds of each search phase"""
+        statistics = {'conflicts': self.conflicts, 'decisions': self.decisions, 'propagations': self.propagations,
+                      'restarts': self.restarts, 'rephases': self.rephases,
+                      'learned_clauses': self.learned, 'kept_clauses': len(self.learned_clauses),
+                      'deleted_clauses': self.deleted_clauses,
+                      'average_lbd': self.lbd_sum / self.conflicts if self.conflicts else 0.0,
+                      'seconds': self.seconds + (time.monotonic() - self.solve_start if self.solve_start else 0.0)}
+        if self.timers is not None:
+            statistics['timers'] = dict(self.timers)
+        return statistics
+
+    def __solve(self, assumptions: List[Union[str, int]], shrink_core: bool):
+        """solve() within the limits set by it"""
+        msg, result = self.__search(assumptions)
+        if msg == UNSAT_MSG and not assumptions:
+            result = None
+        elif msg == UNSAT_MSG:
+            given = {self.representative(self.to_internal_literal(lit)): lit for lit in assumptions}
+            result = [given[lit] for lit in result]
+            if shrink_core:
+                result = self.shrink_core(result)
+        elif msg == SAT_MSG and (self.preprocessor is not None or self.substituted):
+            model = {var: value == TRUE for var, value in enumerate(self.values) if var and value != UNASSIGNED}
+            for var, lit in enumerate(self.representatives):
+                if lit:
+                    model[var] = model[abs(lit)] == (lit > 0)
+            if self.preprocessor is not None:
+                model = self.preprocessor.extend_model(model)
+            result = {self.var_names[var]: model.get(var) for var in range(1, self.num_vars + 1)}
+        return msg, result
 
-        # update relevant dbs
-        self.assignment_dict[decision_variable] = decision
-        self.update_graph(decision_variable)
-        self.decision_level_history[self.level] = DecisionLevel(decision_variable)
+    def preprocess(self, frozen: Iterable[Union[str, int]] = ()) -> bool:
+        """simplify the clauses with the SatELite style Preprocessor, before the first solve(). Models returned by
+        solve() are extended to the eliminated variables. Variables of clauses added later and of assumptions must
+        be frozen. return False if the formula was found unsat"""
+        assert not self.learned_clauses and self.preprocessor is None
+        if self.proof is not None and self.proof.lrat:
+            raise ValueError('preprocessing is not supported with LRAT proofs')
+        if self.has_empty_clause:
+            return False
+        self.cancel_until(0)
+        db = self.clause_db
+        clauses = [list(db.get_literals(cref)) for cref in range(len(db.sizes)) if not db.is_deleted(cref)]
+        for lit in self.trail:
+            clauses.append([lit])
+            if self.proof is not None:
+                self.proof.add(clauses[-1])
+            self.reset_current_node(abs(lit))
+        self.trail = []
+        self.qhead = 0
+        self.clause_db = ClauseArena()
+        self.wv_db = WatchVariableDb(self.num_vars)
+
+        self.preprocessor = Preprocessor(clauses, [abs(self.to_internal_literal(lit)) for lit in frozen], self.proof)
+        if not self.preprocessor.run():
+            self.derive_empty_clause()
+            return False
+        self.eliminated = set(self.preprocessor.get_eliminated())
+        for var in self.eliminated:
+            self.VSIDS_heap.remove(var)
+        self.add_int_clauses(self.preprocessor.get_clauses())
+        return True
 
-        return decision_variable, None
+    def __search(self, assumptions: List[Union[str, int]]):
+        """cdcl loop, returns (SAT_MSG, assignments), (UNSAT_MSG, failed internal assumption literals) or
+        (UNKNOWN_MSG, None) once a limit is reached"""
+        self.cancel_until(0)
+        self.assumptions = [self.representative(self.to_internal_literal(lit)) for lit in assumptions]
+        if self.seed is not None and self.randomized_vars < self.num_vars:
+            self.randomize_activities()
+        msg, _ = self.start_sat()
+        if msg is not True:
+            return msg, []
+        if self.inprocessing and self.conflicts >= self.next_inprocess and not self.inprocess():
+            return UNSAT_MSG, []
 
+        while True:
+            if self.out_of_budget():
+                return UNKNOWN_MSG, None
+            decision_var, assignments = self.decide()
+            if decision_var == SAT_MSG or decision_var == UNSAT_MSG:
+                return decision_var, assignments
+            self.decisions += 1
+
+            conflict_clause, backjump_level = self.propagate(decision_var)
+            while conflict_clause is not True:
+                if conflict_clause is UNSAT_MSG:
+                    return UNSAT_MSG, []
+                self.backtrack(conflict_clause, backjump_level)
+                if self.out_of_budget():  # a run of conflicts without decisions
+                    return UNKNOWN_MSG, None
+                conflict_clause, backjump_level = self.propagate(BACKTRACK_MSG)
+
+            if self.should_restart():
+                self.restart()
+                if self.start_sat()[0] is not True:  # level 0 literals kept by chronological backtracking
+                    return UNSAT_MSG, []
+                if self.conflicts >= self.next_rephase:
+                    self.rephase()
+                if self.exchange is not None and not self.import_clauses():
+                    return UNSAT_MSG, []
+                if self.inprocessing and self.conflicts >= self.next_inprocess and not self.inprocess():
+                    return UNSAT_MSG, []
+
+    def out_of_budget(self) -> bool:
+        """whether the search should stop - interrupted, or out of conflicts, propagations or time"""
+        return self.interrupted or self.conflicts >= self.conflict_budget or \
+            self.propagations >= self.propagation_budget or time.monotonic() >= self.deadline
+
+    def randomize_activities(self):
+        """add small random activities to the variables not randomized yet, so solvers with different seeds
+        branch differently"""
+        activity = self.VSIDS_heap.activity
+        for var in range(self.randomized_vars + 1, self.num_vars + 1):
+            activity[var] += self.random.random() * 1e-3 * self.VSIDS_heap.bump_increment
+        self.randomized_vars = self.num_vars
+        self.VSIDS_heap.rebuild()
+
+    def analyze_final(self, failed: int) -> List[int]:
+        """assumptions responsible for assumption failed being false - walk the trail back from its negation
+        marking reason clause variables, the marked decisions are all assumptions"""
+        core = [failed]
+        seen, levels = self.seen, self.levels
+        seen[abs(failed)] = True
+        start = self.trail_lim[0] if self.trail_lim else len(self.trail)
+        for assigned in reversed(self.trail[start:]):
+            var = abs(assigned)
+            if not seen[var]:
+                continue
+            reason = self.reasons[var]
+            if reason is None:
+                core.append(assigned)
+            else:
+                for lit in self.clause_db.get_literals(reason):
+                    if levels[abs(lit)] > 0:
+                        seen[abs(lit)] = True
+            seen[var] = False
+        seen[abs(failed)] = False
+        return core
 
-    def t_update(self, decision_variable, assignment):
+    def shrink_core(self, core: List[Union[str, int]]) -> List[Union[str, int]]:
+        """deletion based core minimization - try to solve without each assumption in turn, when still unsat
+        continue from the (smaller) core of that call"""
+        i = 0
+        while i < len(core):
+            candidate = core[:i] + core[i + 1:]
+            msg, smaller = self.__solve(candidate, False)
+            if msg == UNSAT_MSG:
+                core = [lit for lit in candidate if lit in smaller]
+            elif msg == UNKNOWN_MSG:
+                break
+            else:
+                i += 1
+        return core
+
+    def t_update(self, decision_variable: str, assignment: bool):
         """pretend to decide new var that is updated based on theory solver,
         -return (decision_variable), if not been set yet
         -return (False) if contradicts old setting
         -return (True) if already been set as such
         """
+        var = self.var_ids[decision_variable]
+        value = TRUE if assignment else FALSE
 
         # not set yet case
-        if self.assignment_dict[decision_variable] is None:
-            self.level += 1
-            self.li_unit_clauses[self.level] = []
-        # update relevant dbs
-            self.assignment_dict[decision_variable] = assignment
-            self.update_graph(decision_variable)
-            self.decision_level_history[self.level] = DecisionLevel(decision_variable)
+        if self.values[var] == UNASSIGNED:
+            self.new_decision_level()
+            self.decide_literal(var if value == TRUE else -var)
             return decision_variable
 
         # set true case
-        elif self.assignment_dict[decision_variable] == assignment:
+        elif self.values[var] == value:
             return True
         # contradicting previous assignment case
         else:
@@ -166,178 +674,648 @@ class Sat_Solver:
         if self.level == 0:
             return self.start_sat()
 
-        # all other levels
-        else:
-            # post backtrack check - don't need to prime unit clauses
-            if unit_variable is not BACKTRACK_MSG:
-                conflict_clause = self.propagate_s1_s3(unit_variable)
-                if conflict_clause is not True:
-                    conflict_clause = self.get_conflict_clause(conflict_clause)
-                    conflict_clause, backjump_level = self.second_highest_node_level(conflict_clause)
-                    return conflict_clause, backjump_level
-
-            conflict_clause = self.propagate_s2()
-            if conflict_clause is not True:
-                conflict_clause = self.get_conflict_clause(conflict_clause)
-                conflict_clause, backjump_level = self.second_highest_node_level(conflict_clause)
-                return conflict_clause, backjump_level
+        # all other levels - the decision of unit_variable, or the asserting literal after backtrack
+        # (BACKTRACK_MSG), is on the trail already
+        conflict_clause = self.propagate_s2()
+        if conflict_clause is not True:
+            if self.chrono_threshold is not None:  # analyzed on the highest level of the conflict
+                conflict_level = max(self.levels[abs(lit)] for lit in self.clause_db.get_literals(conflict_clause))
+                self.cancel_until(conflict_level)
+                if conflict_level == 0:
+                    return self.derive_empty_clause(conflict_clause)
+            conflict_clause = self.get_conflict_clause(conflict_clause)
+            conflict_clause, backjump_level = self.second_highest_node_level(conflict_clause)
+            return conflict_clause, backjump_level
 
         return True, None
 
     def propagate_s2(self):
-        """Update forced assignments that follow from clauses in self.li_unit_clauses at current level.
-        After each forced assignment call self.propagate_s1_s3 with newly assigned variable. If self.propagate_s1_s3
-        returns clause we are in conflict and have found a contradiction clause which we return. Otherwise return True
-        unit propagate at current level
+        """propagate the trail assignments from self.qhead on, calling self.propagate_s1_s3 with each of them.
+        The assignments they force are pushed on the trail and propagated in turn.
         - return True if propagates successfully
         - otherwise return conflict clause
         """
-        for clause, implication in self.li_unit_clauses[self.level]:
-            wv = clause.get_wv1()
-            if self.assignment_dict[wv] is None:  # not set
-                self.add_lit_assignment(wv, clause, implication)
-                li = self.propagate_s1_s3(wv)
-                if li is not True:
-                    return li
-
-            elif self.assignment_dict[wv] == clause.is_positive_variable(wv):
-                continue
-            else:
-                assert False, "Shouldn't evaluate to false here"
-
-        return True
+        trail = self.trail
+        start = len(trail)
+        conflict = True
+        while self.qhead < len(trail):
+            self.qhead += 1
+            conflict = self.propagate_s1_s3(trail[self.qhead - 1])
+            if conflict is not True:
+                break
+        self.propagations += len(trail) - start
+        return conflict
 
 
-    def propagate_s1_s3(self, unit_variable: str): # x,y (~x|~y)
-        """ given variable freshly assigned in self.assignment_dict, replace as watch variable from clauses that negate
-        variables assignment. If variable is newly unit clause, add to current level's self.li_unit_clauses
-        (the forced assignment queue to propagate), if clause is contradicted, return clause
-        at all times coherence within self.wv_db is maintained.
+    def propagate_s1_s3(self, unit_literal: int): # x,y (~x|~y)
+        """ given literal freshly assigned true in self.values, replace its negation as watch literal in clauses
+        that watch it. If clause is newly unit, its literal is assigned at the current level and pushed on the
+        trail, which self.propagate_s2 propagates next, if clause is contradicted, return clause.
+        The watch list is compacted in place - kept watches are copied down from i to j and the tail is cut
+        at the end, so at all times coherence within self.wv_db is maintained.
         unit propagate at current level
         - return True if propagates successfully
         - otherwise return conflict clause
         """
-        illegal_setting = not self.assignment_dict[unit_variable]
+        false_lit = -unit_literal
+        values = self.values
+        watch_lists = self.wv_db.watch_lists
+        trail, levels, reasons, level = self.trail, self.levels, self.reasons, self.level
+        lit_level = levels[abs(unit_literal)]  # below level only for literals kept by chronological backtracking
 
-        clauses_to_update = self.wv_db.get_clauses_to_be_fixed(unit_variable, illegal_setting)
-        for clause in clauses_to_update:
+        # binary clauses, only the implied literal is read
+        binaries = self.wv_db.binary_lists[lit_index(false_lit)]
+        for k in range(0, len(binaries), 2):
+            implied = binaries[k]
+            value = values[abs(implied)] * implied
+            if value == UNASSIGNED:
+                values[abs(implied)] = TRUE if implied > 0 else FALSE
+                levels[abs(implied)] = lit_level
+                reasons[abs(implied)] = binaries[k + 1]
+                trail.append(implied)
+            elif value < 0:
+                return binaries[k + 1]
 
-            status = clause.find_legal_wv(unit_variable, self.assignment_dict)
-            if status[0] is True and status[1] is None: # already true case
-                self.wv_db.insert_clause_wv_to_wvdict(clause, unit_variable)
-            elif status[1] is None:  # non unit new wv case
-                self.wv_db.insert_clause_wv_to_wvdict(clause, status[0])
-            elif status[1] is True: # newly unit case
-                self.li_unit_clauses[self.level].append(tuple([clause, clause]))
+        arena = self.clause_db.literals
+        offsets = self.clause_db.offsets
+        sizes = self.clause_db.sizes
+        watches = self.wv_db.get_clauses_to_be_fixed(false_lit)
+        conflict = True
+        end = len(watches)
+        i = j = 0
+        while i < end:
+            cref = watches[i]
+            blocker = watches[i + 1]
+            i += 2
+            # already true case, clause is not touched
+            if values[abs(blocker)] * blocker > 0:
+                watches[j] = cref
+                watches[j + 1] = blocker
+                j += 2
+                continue
 
+            start = offsets[cref]
+            first = arena[start]
+            if first == false_lit:
+                first = arena[start + 1]
+                arena[start] = first
+                arena[start + 1] = false_lit
+            if first != blocker and values[abs(first)] * first > 0:
+                watches[j] = cref
+                watches[j + 1] = first
+                j += 2
+                continue
 
-            elif status[1] is False:  # contradiction case
-                self.wv_db.insert_clause_wv_to_wvdict(clause, unit_variable)
+            # non unit new wv case
+            for k in range(start + 2, start + sizes[cref]):
+                lit = arena[k]
+                if values[abs(lit)] * lit >= 0:
+                    arena[start + 1] = lit
+                    arena[k] = false_lit
+                    new_watches = watch_lists[lit_index(lit)]
+                    new_watches.append(cref)
+                    new_watches.append(first)
+                    break
+            else:
+                watches[j] = cref
+                watches[j + 1] = first
+                j += 2
+                if values[abs(first)] == UNASSIGNED:  # newly unit case
+                    values[abs(first)] = TRUE if first > 0 else FALSE
+                    levels[abs(first)] = level if lit_level == level else \
+                        max(levels[abs(arena[k])] for k in range(start + 1, start + sizes[cref]))
+                    reasons[abs(first)] = cref
+                    trail.append(first)
+                else:  # contradiction case
+                    conflict = cref
+                    while i < end:
+                        watches[j] = watches[i]
+                        watches[j + 1] = watches[i + 1]
+                        i += 2
+                        j += 2
+        del watches[j:]
+        return conflict
 
-                return clause
-                # return False  # at l0 false, other levels resolve
-        return True
+    def get_conflict_clause(self, conflict_cref: int) -> Clause:
+        """first uip learning - walk backwards over the current level's assignment trail, resolving the conflict
+        clause with the reason of every marked variable, until a single current level literal (the first uip)
+        remains. Literals of level 0 are dropped, the asserting literal is returned first"""
+        seen = self.seen
+        levels = self.levels
+        level = self.level
+        trail = self.trail
+        index = len(trail)
+        learned = [0]  # place of asserting literal
+        marked = []
+        pending = 0  # marked current level variables not yet resolved
+        pivot = 0
+        flags = self.clause_db.flags
+        reason = self.conflict_cref = conflict_cref
+        while True:
+            if flags[reason] & LEARNED:
+                self.bump_clause(reason)
+            for lit in self.clause_db.get_literals(reason):
+                var = abs(lit)
+                if var == pivot or seen[var]:
+                    continue
+                seen[var] = True
+                marked.append(var)
+                if levels[var] == level:
+                    pending += 1
+                elif levels[var] > 0:
+                    learned.append(lit)
 
-    def get_conflict_clause(self, clause: Clause) -> Clause:
-        """resolve conflict clause until uip within then return new conflict clause"""
-        uip = self.decision_level_history[self.level].find_first_uip(clause, self.nodes)
+            # last assigned marked variable
+            index -= 1
+            while not seen[abs(trail[index])] or levels[abs(trail[index])] != level:
+                index -= 1
+            pivot = abs(trail[index])
+            pending -= 1
+            if pending == 0:
+                break
+            reason = self.reasons[pivot]
 
-        last_assigned = self.decision_level_history[self.level].find_last_assigned_literal(clause)
-        c_tag = self.nodes[last_assigned].get_parent_clause()
-        current = clause.resolve(c_tag)
+        learned[0] = -pivot if self.values[pivot] == TRUE else pivot
+        learned = self.minimize_clause(learned, marked)
+        for var in marked:
+            seen[var] = False
+        return Clause(learned)
 
-        while uip not in current.get_variables():
-            last_assigned = self.decision_level_history[self.level].find_last_assigned_literal(current)
-            c_tag = self.nodes[last_assigned].get_parent_clause()
-            current = clause.resolve(c_tag)
+    def minimize_clause(self, learned: List[int], marked: List[int]) -> List[int]:
+        """recursive minimization - drop literals of the learned clause that are implied by its other literals.
+        Variables are marked as seen by the conflict analysis, marked gets every variable seen here"""
+        levels = self.levels
+        abstract_levels = 0
+        for i in range(1, len(learned)):
+            abstract_levels |= 1 << (levels[abs(learned[i])] & 31)
+        minimized = [learned[0]]
+        for i in range(1, len(learned)):
+            var = abs(learned[i])
+            if self.reasons[var] is None or not self.literal_redundant(var, abstract_levels, marked):
+                minimized.append(learned[i])
+        return minimized
 
-        return current
+    def literal_redundant(self, var: int, abstract_levels: int, marked: List[int]) -> bool:
+        """var is implied by the learned clause if every path back from it in the implication graph ends in a seen
+        variable or in level 0. Variables whose level is not in abstract_levels (a bitmask of the clause's levels
+        mod 32) can't end in the clause, so the search stops there"""
+        seen, levels, reasons = self.seen, self.levels, self.reasons
+        db = self.clause_db
+        top = len(marked)
+        stack = [var]
+        while stack:
+            for lit in db.get_literals(reasons[stack.pop()]):
+                parent = abs(lit)
+                if seen[parent] or levels[parent] == 0:
+                    continue
+                if reasons[parent] is not None and (1 << (levels[parent] & 31)) & abstract_levels:
+                    seen[parent] = True
+                    marked.append(parent)
+                    stack.append(parent)
+                else:
+                    for k in range(top, len(marked)):
+                        seen[marked[k]] = False
+                    del marked[top:]
+                    return False
+        return True
 
     def backtrack(self, conflict_clause: Clause, backtrack_level: int,):
+        """add conflict clause, asserting at backtrack_level, and backtrack - to backtrack_level, or one level
+        back with chronological backtracking"""
+        asserting_level = backtrack_level
+        if self.chrono_threshold is not None and self.level - backtrack_level > self.chrono_threshold:
+            backtrack_level = self.level - 1
+        if self.proof is not None:  # added before reduce_db() deletes clauses it may be derived from
+            hints = self.derivation_hints(self.conflict_cref, conflict_clause.literals) if self.proof.lrat else ()
+            clause_id = self.proof.add(conflict_clause.literals, hints)
+        lbd = self.compute_lbd(conflict_clause.literals)
+        self.restart_policy.on_conflict(lbd)
+        self.save_trail_phases()
+        self.cancel_until(backtrack_level)
+        self.conflicts += 1
+        self.lbd_sum += lbd
+        self.clause_bump /= CLAUSE_DECAY
+        if self.conflicts >= self.next_reduce:
+            self.reduce_db()
+        if self.conflicts >= self.next_progress:
+            self.next_progress += self.progress_interval
+            self.progress(self.statistics)
+
         # add clause to wv db
-        self.add_conflict_clause_to_db(conflict_clause)
+        cref = self.add_conflict_clause_to_db(conflict_clause, lbd)
+        if self.proof is not None:
+            self.set_proof_id(cref, clause_id)
+        if self.exchange is not None and len(conflict_clause) <= EXPORT_SIZE and lbd <= EXPORT_LBD:
+            self.exchange.export(conflict_clause.literals, lbd)
+
+        # the asserting literal goes on the trail, propagate() takes it from there
+        self.add_lit_assignment(conflict_clause.get_wv1(), cref)
+        self.levels[abs(conflict_clause.get_wv1())] = asserting_level
+        self.propagations += 1
 
-        # add to levels unit clauses
-        if backtrack_level == 0:
-            if conflict_clause.is_unit_clause():
-                self.l0_unit_clauses = [tuple([conflict_clause, None])]
+    def save_trail_phases(self):
+        """the trail below the conflict level is conflict free, keep its phases as target and best phases if it is
+        the longest since the last restart and rephase"""
+        assigned = self.trail_lim[self.level - 1] if self.level else 0
+        for phases, longest in ((self.target_phases, self.target_assigned), (self.best_phases, self.best_assigned)):
+            if assigned > longest:
+                for lit in self.trail[:assigned]:
+                    phases[abs(lit)] = TRUE if lit > 0 else FALSE
+        self.target_assigned = max(self.target_assigned, assigned)
+        self.best_assigned = max(self.best_assigned, assigned)
+
+    def cancel_until(self, backtrack_level: int):
+        """erase levels above backtrack_level - truncate the trail back to where level backtrack_level + 1 starts.
+        Literals of lower levels found there with chronological backtracking are kept in order and propagated
+        again"""
+        if self.level <= backtrack_level:
+            return
+        trail, levels = self.trail, self.levels
+        start = self.trail_lim[backtrack_level]
+        kept = []
+        for i in range(len(trail) - 1, start - 1, -1):
+            if levels[abs(trail[i])] > backtrack_level:
+                self.reset_current_node(abs(trail[i]))
             else:
-                self.l0_unit_clauses = [tuple([conflict_clause, conflict_clause])]
-        else:
-            self.li_unit_clauses[backtrack_level] = [tuple([conflict_clause, conflict_clause])]
-
-        # erase previous levels
-        for i in range(self.level, backtrack_level, -1):
-            del self.li_unit_clauses[i]
-            for var in reversed(self.decision_level_history[i].get_assignment_history()):
-                self.reset_current_node(var, backtrack_level)
-                self.assignment_dict[var] = None
-            del self.decision_level_history[i]
+                kept.append(trail[i])
+        del trail[start:]
+        trail.extend(reversed(kept))
+        del self.trail_lim[backtrack_level:]
+        self.qhead = start
         self.level = backtrack_level
 
+    def bump_clause(self, cref: int):
+        """learned clause took part in conflict analysis - bump its activity and update its LBD if it improved"""
+        db = self.clause_db
+        db.flags[cref] |= USED
+        db.activities[cref] += self.clause_bump
+        if db.activities[cref] > 1e20:
+            for learned in self.learned_clauses:
+                db.activities[learned] *= 1e-20
+            self.clause_bump *= 1e-20
+        if db.lbds[cref] > CORE_LBD:
+            lbd = self.compute_lbd(db.get_literals(cref))
+            if lbd < db.lbds[cref]:
+                db.lbds[cref] = lbd
 
-    def reset_current_node(self, var, backjump_level):
-        """erase node from implication graph when backjumping"""
-        node = self.nodes[var]
-        for parent in node.parents:
-            self.nodes[parent.variable].children = [child for child in node.children if child.level <= backjump_level]
-        node.value = None
-        node.level = -1
-        node.parents = []
-        node.children = []
-        node.clause = None
+    def reduce_db(self):
+        """delete the worse half of the learned clauses, by LBD and then activity. Core clauses, tier 2 clauses
+        used since the last reduction, binary clauses and reasons of current assignments are kept"""
+        db, proof = self.clause_db, self.proof
+        flags, lbds, activities = db.flags, db.lbds, db.activities
+        kept, candidates = [], []
+        for cref in self.learned_clauses:
+            used = flags[cref] & USED
+            flags[cref] &= ~USED
+            if db.sizes[cref] <= 2 or lbds[cref] <= CORE_LBD or (used and lbds[cref] <= TIER2_LBD):
+                kept.append(cref)
+            else:
+                candidates.append(cref)
 
+        candidates.sort(key=lambda cref: (-lbds[cref], activities[cref]))
+        to_delete = len(candidates) // 2
+        for cref in candidates:
+            if to_delete and self.reasons[abs(db.literals[db.offsets[cref]])] != cref:
+                if proof is not None:
+                    proof.delete(db.get_literals(cref), self.proof_ids[cref])
+                db.delete(cref)
+                to_delete -= 1
+                self.deleted_clauses += 1
+            else:
+                kept.append(cref)
+        self.learned_clauses = kept
+        self.wv_db.remove_deleted(db)
+        if db.garbage > len(db.literals) // 2:
+            db.collect_garbage()
 
-    def add_lit_assignment(self, wv: str, clause: Clause, implication):
-        """update assignment that arises from bcp"""
+        self.reduce_interval += REDUCE_INCREMENT
+        self.next_reduce = self.conflicts + self.reduce_interval
 
-        self.assignment_dict[wv] = clause.is_positive_variable(wv)
-        self.decision_level_history[self.level].add_assignment(wv)
-        self.update_graph(wv, implication)
+    def compute_lbd(self, literals: Iterable[int]) -> int:
+        """literal block distance - number of distinct decision levels in clause"""
+        levels = self.levels
+        return len(set(levels[abs(lit)] for lit in literals))
 
-    def second_highest_node_level(self, clause: Clause):
-        """find second highest assignment level of clause update so first wv is said assignment"""
+    def should_restart(self) -> bool:
+        return self.level > 0 and self.restart_policy.should_restart()
 
-        variables = clause.get_variables()
+    def restart(self):
+        """backtrack to level 0, level 0 is already propagated. saved phases keep the previous assignment"""
+        self.cancel_until(0)
+        self.restarts += 1
+        self.target_assigned = 0
+        self.restart_policy.on_restart()
 
-        max = -2
-        current_var = None
-        for variable in variables:
-            if self.nodes[variable].level > max:
-                max = self.nodes[variable].level
-                current_var = variable
+    def rephase(self):
+        """reset the saved phases to the next phases of REPHASES - the polarity rule ('original'), its inverse,
+        the best phases, random ones or those a local search over the irredundant clauses reaches from the best
+        phases ('walk'). The target phases are cleared and the best ones start over"""
+        kind = REPHASES[self.rephases % len(REPHASES)]
+        self.rephases += 1
+        self.next_rephase = self.conflicts + REPHASE_INTERVAL * (self.rephases + 1)
+        saved, best = self.saved_phases, self.best_phases
+        if kind == 'walk':
+            self.walk_phases()
+        for var in range(1, self.num_vars + 1):
+            if kind == 'original':
+                saved[var] = self.initial_phase(var)
+            elif kind == 'inverted':
+                saved[var] = -self.initial_phase(var)
+            elif kind == 'best' and best[var] != UNASSIGNED:
+                saved[var] = best[var]
+            elif kind == 'random':
+                saved[var] = self.random.choice((TRUE, FALSE))
+            self.target_phases[var] = UNASSIGNED
+        self.target_assigned = self.best_assigned = 0
 
-        backjump_level = -2
-        for variable in variables:
-            if max > self.nodes[variable].level > backjump_level:
-                backjump_level = self.nodes[variable].level
+    def walk_phases(self):
+        """saved phases of the walk rephase - local search over the irredundant clauses not satisfied at level 0,
+        without their level 0 literals, starting from the best phases"""
+        values, db = self.values, self.clause_db
+        clauses = []
+        for cref in range(len(db.sizes)):
+            if db.flags[cref] & (LEARNED | DELETED):
+                continue
+            literals = db.get_literals(cref)
+            if not any(values[abs(lit)] * lit > 0 for lit in literals):
+                clauses.append([lit for lit in literals if values[abs(lit)] == UNASSIGNED])
+        phases = [UNASSIGNED] + [self.best_phases[var] or self.saved_phases[var] or self.initial_phase(var)
+                                 for var in range(1, self.num_vars + 1)]
+        walk(clauses, phases, self.random)
+        self.saved_phases[1:] = phases[1:]
 
-        if backjump_level != -2:
-            if clause.get_wv1() == current_var:
-                return clause, backjump_level
+    def inprocess(self) -> bool:
+        """level 0 simplification between restarts - failed literal probing with hyper binary resolution, then
+        equivalent literal substitution. return False if the formula was found unsat"""
+        self.next_inprocess = self.conflicts + INPROCESS_INTERVAL
+        if not (self.probe() and self.substitute_equivalent_literals()):
+            return False
+        self.assumptions = [self.representative(lit) for lit in self.assumptions]
+        return True
+
+    def import_clauses(self) -> bool:
+        """add the learned clauses other workers exported since the last call, at level 0. Clauses over variables
+        eliminated here are skipped, and all of them with a proof, which can't derive them. return False on a level 0
+        conflict"""
+        if self.proof is not None:
+            return True
+        values = self.values
+        for literals, lbd in self.exchange.imports():
+            if any(abs(lit) > self.num_vars or abs(lit) in self.eliminated for lit in literals):
+                continue
+            literals = set(map(self.representative, literals))
+            if any(-lit in literals or values[abs(lit)] * lit > 0 for lit in literals):
+                continue
+            literals = [lit for lit in literals if values[abs(lit)] == UNASSIGNED]
+            if not literals:
+                self.has_empty_clause = True
+                return False
+            cref = self.clause_db.add(literals, learned=True, lbd=min(lbd, len(literals)))
+            if len(literals) == 1:
+                self.add_lit_assignment(literals[0], cref)
             else:
-                clause.set_wv2(clause.get_wv1())
-                clause.set_wv1(current_var)
-                return clause, backjump_level
-        else:
+                self.learned_clauses.append(cref)
+                self.attach_clause(cref, literals)
+        return self.start_sat()[0] is True
+
+    def representative(self, lit: int) -> int:
+        """literal lit was substituted by, lit itself if it was not"""
+        substitute = self.representatives[abs(lit)]
+        if not substitute:
+            return lit
+        return substitute if lit > 0 else -substitute
+
+    def add_root_unit(self, lit: int) -> bool:
+        """learn unit clause lit at level 0 and propagate it, return False on conflict"""
+        cref = self.clause_db.add([lit], learned=True)
+        if self.proof is not None:
+            self.proof.add([lit])
+        self.add_lit_assignment(lit, cref)
+        return self.start_sat()[0] is True
+
+    def assume(self, lit: int) -> Union[int, None]:
+        """decide unassigned lit on a new level and propagate it, the level is left for cancel_until() to undo.
+        return the number of variables assigned on the level, None on conflict"""
+        self.new_decision_level()
+        self.decide_literal(lit)
+        if self.propagate_s2() is not True:
+            return None
+        return len(self.trail) - self.trail_lim[-1]
+
+    def probe(self) -> bool:
+        """failed literal probing - propagate each literal with binary implications on its own at level 1, a
+        literal that leads to conflict is fixed false at level 0. Literals implied on the way through longer
+        clauses are implied by the probe alone, each gives the hyper binary resolvent (~probe | implied).
+        return False if the formula was found unsat"""
+        self.cancel_until(0)
+        if self.start_sat()[0] is not True:  # level 0 propagated before probing on top of it
+            return False
+        binary_lists, values, sizes = self.wv_db.binary_lists, self.values, self.clause_db.sizes
+        candidates = [lit for var in range(1, self.num_vars + 1) if values[var] == UNASSIGNED and
+                      not self.representatives[var] for lit in (var, -var) if binary_lists[lit_index(-lit)]]
+        saved_phases = list(self.saved_phases)
+        budget, resolvents = PROBE_BUDGET, HBR_LIMIT
+        for lit in candidates:
+            if budget <= 0:
+                break
+            if values[abs(lit)] != UNASSIGNED:
+                continue
+            assigned = self.assume(lit)
+            implied = []
+            if assigned is not None:
+                implied = [other for other in self.trail[self.trail_lim[0] + 1:] if sizes[self.reasons[abs(other)]] > 2]
+            budget -= len(self.trail) - self.trail_lim[0]
+            self.cancel_until(0)
+            if assigned is None:
+                if not self.add_root_unit(-lit):
+                    return False
+                continue
+            for other in implied[:resolvents]:
+                if other not in binary_lists[lit_index(-lit)][::2]:
+                    cref = self.clause_db.add([-lit, other], learned=True, lbd=2)
+                    if self.proof is not None:
+                        self.proof.add([-lit, other])
+                    self.learned_clauses.append(cref)
+                    self.attach_clause(cref, [-lit, other])
+                    resolvents -= 1
+        self.saved_phases = saved_phases
+        return True
+
+    def equivalent_literal_classes(self) -> List[List[int]]:
+        """strongly connected components of the binary implication graph over unassigned literals, literals of a
+        component are all equivalent. iterative tarjan"""
+        binary_lists, values, flags = self.wv_db.binary_lists, self.values, self.clause_db.flags
+
+        def successors(lit: int) -> List[int]:
+            implications = binary_lists[lit_index(-lit)]
+            return [implications[k] for k in range(0, len(implications), 2)
+                    if values[abs(implications[k])] == UNASSIGNED and not flags[implications[k + 1]] & DELETED]
+
+        indices, low, on_stack = {}, {}, set()
+        stack, classes = [], []
+        for var in range(1, self.num_vars + 1):
+            if values[var] != UNASSIGNED or self.representatives[var]:
+                continue
+            for root in (var, -var):
+                if root in indices:
+                    continue
+                indices[root] = low[root] = len(indices)
+                stack.append(root)
+                on_stack.add(root)
+                work = [(root, iter(successors(root)))]
+                while work:
+                    lit, children = work[-1]
+                    for child in children:
+                        if child not in indices:
+                            indices[child] = low[child] = len(indices)
+                            stack.append(child)
+                            on_stack.add(child)
+                            work.append((child, iter(successors(child))))
+                            break
+                        if child in on_stack and indices[child] < low[lit]:
+                            low[lit] = indices[child]
+                    else:
+                        work.pop()
+                        if work and low[lit] < low[work[-1][0]]:
+                            low[work[-1][0]] = low[lit]
+                        if low[lit] == indices[lit]:
+                            component = []
+                            while True:
+                                member = stack.pop()
+                                on_stack.discard(member)
+                                component.append(member)
+                                if member == lit:
+                                    break
+                            if len(component) > 1:
+                                classes.append(component)
+        return classes
+
+    def substitute_equivalent_literals(self) -> bool:
+        """replace the literals of each equivalence class by the one with the smallest variable and rebuild the
+        clause db. return False if some literal is equivalent to its negation"""
+        substitutes = {}
+        for component in self.equivalent_literal_classes():
+            members = set(component)
+            contradictions = [lit for lit in members if -lit in members]
+            if contradictions:
+                if self.proof is not None:
+                    self.proof.add([-contradictions[0]])
+                self.derive_empty_clause()
+                return False
+            representative = min(component, key=abs)
+            for lit in component:
+                if lit != representative:
+                    substitutes[abs(lit)] = representative if lit > 0 else -representative
+        if not substitutes:
+            return True
+
+        for var, lit in substitutes.items():
+            self.representatives[var] = lit
+            self.VSIDS_heap.remove(var)
+        for var, lit in enumerate(self.representatives):
+            if lit and abs(lit) in substitutes:
+                self.representatives[var] = substitutes[abs(lit)] if lit > 0 else -substitutes[abs(lit)]
+        self.substituted += len(substitutes)
+        return self.rebuild_clause_db()
+
+    def rebuild_clause_db(self) -> bool:
+        """store the clauses again at level 0 with substituted literals replaced, clauses satisfied at level 0
+        dropped and false literals removed. return False on a level 0 conflict"""
+        old_db, values, proof = self.clause_db, self.values, self.proof
+        self.clause_db = ClauseArena()
+        self.wv_db = WatchVariableDb(self.num_vars)
+        self.learned_clauses = []
+        for lit in self.trail:
+            self.reasons[abs(lit)] = None
+            if proof is not None:
+                proof.add([lit])
+        replaced = []  # old clauses, deleted from the proof once the clauses replacing them are added
+        for cref in range(len(old_db.sizes)):
+            if old_db.is_deleted(cref):
+                continue
+            old_literals = old_db.get_literals(cref)
+            literals = set(map(self.representative, old_literals))
+            if any(-lit in literals or values[abs(lit)] * lit > 0 for lit in literals):
+                if proof is not None and len(old_literals) > 1:
+                    replaced.append(old_literals)
+                continue
+            literals = [lit for lit in literals if values[abs(lit)] == UNASSIGNED]
+            if not literals:
+                self.derive_empty_clause()
+                return False
+            if proof is not None and set(literals) != set(old_literals):
+                proof.add(literals)
+                replaced.append(old_literals)
+            if old_db.flags[cref] & LEARNED:
+                new_cref = self.clause_db.add(literals, learned=True, lbd=min(old_db.lbds[cref], len(literals)))
+                self.clause_db.activities[new_cref] = old_db.activities[cref]
+                if len(literals) > 1:
+                    self.learned_clauses.append(new_cref)
+            else:
+                new_cref = self.clause_db.add_original(literals)
+                if new_cref is None:
+                    continue
+            if len(literals) == 1:
+                self.add_lit_assignment(literals[0], new_cref)
+            else:
+                self.attach_clause(new_cref, literals)
+        for old_literals in replaced:
+            proof.delete(old_literals)
+        return self.start_sat()[0] is True
+
+    def reset_current_node(self, var: int):
+        """erase node from implication graph when backjumping, saving the variable's phase"""
+        self.saved_phases[var] = self.values[var]
+        self.values[var] = UNASSIGNED
+        self.levels[var] = -1
+        self.reasons[var] = None
+        self.VSIDS_heap.insert(var)
+
+
+    def add_lit_assignment(self, wv: int, implication: Union[int, None]):
+        """assign wv at the current level with reason implication (None for a decision) and push it on the trail"""
+        var = abs(wv)
+        self.values[var] = TRUE if wv > 0 else FALSE
+        self.trail.append(wv)
+        self.update_graph(var, implication)
+
+    def second_highest_node_level(self, clause: Clause):
+        """find second highest assignment level of clause, update so first wv is the highest level literal and
+        second wv is the second highest level literal"""
+        literals = clause.literals
+        if len(literals) == 1:
             return clause, 0
 
+        highest, second = 0, 1
+        if self.levels[abs(literals[second])] > self.levels[abs(literals[highest])]:
+            highest, second = second, highest
+        for i in range(2, len(literals)):
+            level = self.levels[abs(literals[i])]
+            if level > self.levels[abs(literals[highest])]:
+                highest, second = i, highest
+            elif level > self.levels[abs(literals[second])]:
+                second = i
+
+        first_lit, second_lit = literals[highest], literals[second]
+        clause.set_wv1(first_lit)
+        clause.set_wv2(second_lit)
+        backjump_level = self.levels[abs(second_lit)]
+        if backjump_level == self.levels[abs(first_lit)]:
+            return clause, max(backjump_level - 1, 0)
+        return clause, backjump_level
+
     def create_clause_jump_level(self, c)->[Clause, int]:
         """generate clause in correct format for theory conflict"""
-        c = Clause(c)
+        c = Clause(self.clause_to_literals(c))
         c, jump_level = self.second_highest_node_level(c)
         return c, jump_level
 
     def __largest_available_vsids_member(self):
-        """return best key if remains, else return true, break ties by lexicographically smaller key"""
-        max = -1
-        best_key = True
-        for key in self.VSIDS_dict:
-            if self.assignment_dict[key] is None:
-                if max < self.VSIDS_dict[key]:
-                    best_key = key
-                    max = self.VSIDS_dict[key]
-                elif max == self.VSIDS_dict[key]:  # key must be an str here
-                    if key < best_key:
-                        best_key = key
-        return best_key
+        """return best variable if remains, else return true, break ties by lexicographically smaller name.
+        assigned variables met on the way are dropped from the heap until backtrack puts them back"""
+        heap = self.VSIDS_heap
+        while len(heap):
+            var = heap.pop()
+            if self.values[var] == UNASSIGNED:
+                return var
+        return True
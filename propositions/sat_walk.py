@@ -0,0 +1,60 @@
+"""WalkSAT local search for the phases of the sat solver. Starting from a full assignment it flips variables of
+falsified clauses - one that falsifies no other clause if there is one, otherwise a random one with probability
+NOISE and one falsifying the fewest others else - and keeps the assignment with the fewest falsified clauses."""
+import random
+from typing import List
+
+NOISE = 0.5
+WALK_FLIPS = 20000  # flips of one walk
+
+
+def walk(clauses: List[List[int]], phases: List[int], rng: random.Random, max_flips: int = WALK_FLIPS) -> int:
+    """local search over clauses of int literals from phases, 1 or -1 by variable, which are set to the best
+    assignment found. return the number of clauses it falsifies"""
+    occurrences = {}  # clauses of each literal
+    true_counts = [0] * len(clauses)
+    for i, clause in enumerate(clauses):
+        for lit in clause:
+            occurrences.setdefault(lit, []).append(i)
+            if phases[abs(lit)] * lit > 0:
+                true_counts[i] += 1
+    falsified = [i for i in range(len(clauses)) if not true_counts[i]]
+    positions = [0] * len(clauses)
+    for position, i in enumerate(falsified):
+        positions[i] = position
+    best = len(falsified)
+    flipped = []  # variables flipped since the best assignment
+
+    for _ in range(max_flips):
+        if not falsified:
+            break
+        clause = clauses[rng.choice(falsified)]
+        # flipping the variable of lit falsifies the clauses -lit alone satisfies
+        breaks = [sum(1 for i in occurrences.get(-lit, ()) if true_counts[i] == 1) for lit in clause]
+        if 0 in breaks:
+            lit = clause[breaks.index(0)]
+        elif rng.random() < NOISE:
+            lit = rng.choice(clause)
+        else:
+            lit = clause[breaks.index(min(breaks))]
+        phases[abs(lit)] = -phases[abs(lit)]
+        flipped.append(abs(lit))
+        for i in occurrences.get(lit, ()):
+            true_counts[i] += 1
+            if true_counts[i] == 1:
+                last = falsified.pop()
+                if last != i:
+                    falsified[positions[i]] = last
+                    positions[last] = positions[i]
+        for i in occurrences.get(-lit, ()):
+            true_counts[i] -= 1
+            if not true_counts[i]:
+                positions[i] = len(falsified)
+                falsified.append(i)
+        if len(falsified) < best:
+            best = len(falsified)
+            flipped = []
+
+    for var in flipped:
+        phases[var] = -phases[var]
+    return best
@@ -0,0 +1,25 @@
+import random
+
+from propositions.sat_walk import walk
+
+
+def test_walk(debug=False):
+    rng = random.Random(3)
+    planted = [0] + [rng.choice((1, -1)) for _ in range(60)]
+    clauses = []
+    while len(clauses) < 240:
+        clause = [rng.choice((1, -1)) * var for var in rng.sample(range(1, 61), 3)]
+        if any(planted[abs(lit)] * lit > 0 for lit in clause):
+            clauses.append(clause)
+    phases = [0] + [-1] * 60
+    falsified = walk(clauses, phases, random.Random(1))
+    if debug:
+        print(falsified)
+    assert falsified == 0
+    assert all(any(phases[abs(lit)] * lit > 0 for lit in clause) for clause in clauses)
+
+    # unsat - the best assignment is kept, not the last one
+    clauses = [[1, 2], [-1, 2], [1, -2], [-1, -2]]
+    phases = [0, 1, 1]
+    assert walk(clauses, phases, random.Random(1), max_flips=50) == 1
+    assert sum(not any(phases[abs(lit)] * lit > 0 for lit in clause) for clause in clauses) == 1
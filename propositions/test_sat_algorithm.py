@@ -1,4 +1,9 @@
+import random
+import threading
+
 from solver import *
+from propositions.sat_helper import VariableHeap, ClauseArena, Clause, TRUE, FALSE
+from propositions.sat_restarts import luby, GlucoseRestarts, LubyRestarts, RESTART_POLICIES
 from propositions.tseitin import *
 
 cnf_l0_true = ['((~x&z)&(~z|y))', '(~z&x)', '(~z&(x&(~x|y)))','(~z&(x&(~x|(y|z))))', '((x|z)&(~z&(x&(~x|(y|z)))))']
@@ -57,4 +62,357 @@ def test_generate_formula_false_l1(debug=False):
         result = run_sat_cnf(f)
         assert result[0] == "UNSAT "
         if debug:
-            print(f, "    ",result)
\ No newline at end of file
+            print(f, "    ",result)
+
+
+def test_vsids_heap(debug=False):
+    heap = VariableHeap(5)
+    for var in [3, 3, 5, 1]:
+        heap.bump(var)
+    heap.decay_activities()
+    heap.bump(2)
+    order = [heap.pop() for _ in range(len(heap))]
+    if debug:
+        print(order)
+    assert order == [3, 2, 1, 5, 4]
+    heap.insert(4)
+    heap.insert(4)
+    assert len(heap) == 1 and 4 in heap and 3 not in heap
+
+
+def clauses_to_cnf_string(clauses: list) -> str:
+    """build cnf string from clauses of dimacs style int literals, variable v is named xv"""
+    def literal(lit):
+        return 'x' + str(lit) if lit > 0 else '~x' + str(-lit)
+
+    def clause(c):
+        s = literal(c[0])
+        for lit in c[1:]:
+            s = '(' + s + '|' + literal(lit) + ')'
+        return s
+
+    f = clause(clauses[0])
+    for c in clauses[1:]:
+        f = '(' + f + '&' + clause(c) + ')'
+    return f
+
+
+def pigeonhole_clauses(holes: int) -> list:
+    """holes + 1 pigeons in holes, variable p*holes+h+1 means pigeon p is in hole h"""
+    clauses = [[p * holes + h + 1 for h in range(holes)] for p in range(holes + 1)]
+    for h in range(holes):
+        for p in range(holes + 1):
+            for q in range(p + 1, holes + 1):
+                clauses.append([-(p * holes + h + 1), -(q * holes + h + 1)])
+    return clauses
+
+
+def test_first_uip_learning(debug=False):
+    for holes in range(1, 5):
+        result = run_sat_cnf(clauses_to_cnf_string(pigeonhole_clauses(holes)))
+        assert result[0] == "UNSAT "
+    # used to learn a non asserting clause and report UNSAT
+    sat = [[-4, -3], [-9, -10], [1, -2, -8, -3], [-2, -3, 4, 6], [-8, 1], [7, -9], [-1], [7, 4, -3, 2], [5, 8, 7],
+           [-1, -8], [8, -6, -1], [2, 3, 6], [10, -4], [-10, 5, -2], [9, 3], [9, -8], [10, -5, -6], [-4, 8, 3, -9],
+           [4, -5], [-7, 10, 1, -9], [9, -7, -2, -10], [2, -7], [-3, 6, 7, -8], [2]]
+    result = run_sat_cnf(clauses_to_cnf_string(sat))
+    if debug:
+        print(result)
+    assert result[0] == "SAT "
+
+
+def test_clause_arena(debug=False):
+    arena = ClauseArena()
+    first = arena.add_original([1, -2, 3])
+    assert arena.add_original([3, 1, -2]) is None
+    second = arena.add_original([-1, 2])
+    learned = arena.add(Clause([4, -3, 2, 1]).literals)
+    if debug:
+        print(arena.literals, arena.offsets, arena.sizes)
+    assert len(arena) == 3 and len(arena.literals) == 9
+    assert list(arena.get_literals(second)) == [-1, 2] and arena.get_clause(learned) == Clause([1, 2, -3, 4])
+    assert arena.hashes[first] == Clause([-2, 3, 1]).hash
+
+    arena.delete(first)
+    assert len(arena) == 2 and arena.is_deleted(first)
+    arena.collect_garbage()
+    assert list(arena.literals) == [-1, 2, 4, -3, 2, 1] and list(arena.get_literals(learned)) == [4, -3, 2, 1]
+    reused = arena.add([5, 6, 7], learned=True, lbd=2)
+    assert reused == first and arena.lbds[reused] == 2 and not arena.is_deleted(reused)
+
+
+def test_restart_policies(debug=False):
+    assert [luby(i) for i in range(1, 16)] == [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8]
+    policy = GlucoseRestarts(min_conflicts=5)
+    for lbd in [2] * 100 + [9] * 5:
+        policy.on_conflict(lbd)
+    assert policy.should_restart()
+    policy.on_restart()
+    assert not policy.should_restart()
+
+    for restart_policy in list(RESTART_POLICIES) + [LubyRestarts(unit=2)]:
+        solver = Sat_Solver(propositional_Formula.parse(clauses_to_cnf_string(pigeonhole_clauses(4))),
+                            restart_policy=restart_policy)
+        assert solver.start_sat()[0] is True
+        restarts = 0
+        while True:
+            decision_var, _ = solver.decide()
+            assert decision_var != SAT_MSG
+            conflict_clause, backjump_level = solver.propagate(decision_var)
+            while conflict_clause is not True and conflict_clause != UNSAT_MSG:
+                solver.backtrack(conflict_clause, backjump_level)
+                conflict_clause, backjump_level = solver.propagate(BACKTRACK_MSG)
+            if conflict_clause == UNSAT_MSG:
+                break
+            if solver.should_restart():
+                solver.restart()
+                restarts += 1
+        if debug:
+            print(restart_policy, restarts)
+        assert isinstance(restart_policy, str) or restarts > 0
+
+
+def test_learned_clause_minimization(debug=False):
+    # x1 at level 1 implies x2, x3 at level 2 implies x4 (from x2) and x5 (from x1) which conflict.
+    # first uip clause is (~x3|~x2|~x1), x2 is implied by x1 so it is dropped
+    solver = Sat_Solver(propositional_Formula.parse(clauses_to_cnf_string([[-1, 2], [-3, -2, 4], [-3, -1, 5],
+                                                                           [-4, -5]])))
+    assert solver.start_sat()[0] is True
+    assert solver.t_update('x1', True) == 'x1'
+    assert solver.propagate('x1') == (True, None)
+    assert solver.t_update('x3', True) == 'x3'
+    conflict_clause, backjump_level = solver.propagate('x3')
+    if debug:
+        print(conflict_clause, backjump_level)
+    assert conflict_clause.literals == [-3, -1] and backjump_level == 1
+
+
+def test_incremental_solve(debug=False):
+    solver = Sat_Solver(propositional_Formula.parse('((x|y)&(~x|z))'))
+    msg, model = solver.solve()
+    assert msg == SAT_MSG
+    msg, core = solver.solve(['x', '~z'])
+    assert msg == UNSAT_MSG and sorted(core) == ['x', '~z']
+    msg, model = solver.solve(['~x'])
+    assert msg == SAT_MSG and model['x'] is False and model['y'] is True
+
+    # new clauses and new variables between calls
+    solver.add_clause((['w'], ['y']))
+    solver.add_formula(propositional_Formula.parse('(~w|~z)'))
+    msg, model = solver.solve(['~x'])
+    if debug:
+        print(msg, model)
+    assert msg == SAT_MSG and model['w'] is True and model['z'] is False
+    assert solver.solve(['z', 'y'])[0] == UNSAT_MSG
+    solver.add_clause(([], ['y']))
+    assert solver.solve()[0] == SAT_MSG
+    solver.add_clause(([], ['x']))
+    assert solver.solve()[0] == UNSAT_MSG
+    assert solver.solve(['w'])[0] == UNSAT_MSG
+
+
+def test_clause_list_solver(debug=False):
+    solver = Sat_Solver(clauses=[['p', '~q'], ['q', 'r', 'F'], ['~p'], ['q', 'T'], ['r', '~T']])
+    msg, model = solver.solve()
+    if debug:
+        print(msg, model)
+    assert msg == SAT_MSG and model == {'p': False, 'q': False, 'r': True}
+    solver.add_clauses([['~r', 'q']])
+    assert solver.solve()[0] == UNSAT_MSG
+
+    for holes in range(1, 4):
+        clauses = pigeonhole_clauses(holes)
+        assert Sat_Solver(clauses=clauses).solve()[0] == UNSAT_MSG
+        assert Sat_Solver(clauses=clauses[1:]).solve()[0] == SAT_MSG
+    solver = Sat_Solver(clauses=[[1, -2], [2, 3]])
+    assert solver.var_names[1:] == ['x1', 'x2', 'x3']
+    assert solver.solve(['~x3'])[0] == SAT_MSG
+    solver.add_clauses([['x3', -1], [-3]])
+    assert solver.solve()[0] == UNSAT_MSG
+
+
+def test_probing_and_equivalences(debug=False):
+    # x1 -> x2 -> x3 -> x1 and x3 -> ~x4, x1 -> x4 : x1 fails, x1, x2, x3 are equivalent
+    clauses = [[-1, 2], [-2, 3], [-3, 1], [-3, -4], [-1, 4], [3, 5, 6], [-5, -6]]
+    solver = Sat_Solver(clauses=clauses, inprocessing=False)
+    assert solver.start_sat()[0] is True
+    assert solver.probe()
+    if debug:
+        print(solver.assignment_dict)
+    assert solver.assignment_dict['x1'] is False and solver.assignment_dict['x2'] is False
+
+    # x4 -> x1 through a ternary clause only, probing x4 learns the hyper binary resolvent (~x4 | x1)
+    solver = Sat_Solver(clauses=[[-4, 2], [-4, 3], [-2, -3, 1], [1, 5, 6]], inprocessing=False)
+    assert solver.probe()
+    db = solver.clause_db
+    assert [-4, 1] in [list(db.get_literals(cref)) for cref in solver.learned_clauses]
+
+    # x1 <-> x2 <-> ~x3
+    clauses = [[-1, 2], [-2, 1], [2, 3], [-2, -3], [1, 4, 5], [3, -4, 5], [-5, 4]]
+    solver = Sat_Solver(clauses=clauses, inprocessing=False)
+    classes = sorted(sorted(component, key=abs) for component in solver.equivalent_literal_classes())
+    assert classes == [[-1, -2, 3], [1, 2, -3]]
+    assert solver.substitute_equivalent_literals()
+    assert solver.substituted == 2 and solver.representatives[2] == 1 and solver.representatives[3] == -1
+    db = solver.clause_db
+    assert all(abs(lit) == 1 or abs(lit) > 3 for cref in range(len(db.sizes)) for lit in db.get_literals(cref))
+    for assumptions in [[], ['x3'], ['~x2', 'x4'], ['x1', '~x4']]:
+        msg, model = solver.solve(assumptions)
+        assert msg == SAT_MSG
+        assert model['x1'] == model['x2'] != model['x3']
+        assert all(model[name.lstrip('~')] != name.startswith('~') for name in assumptions)
+    assert solver.solve(['x1', 'x3'])[0] == UNSAT_MSG
+    assert sorted(solver.solve(['x4', 'x2', 'x3'])[1]) == ['x2', 'x3']
+
+    solver = Sat_Solver(clauses=[[-1, 2], [-2, -1], [1, 2], [-2, 1]])
+    assert solver.solve() == (UNSAT_MSG, None)
+
+
+def test_unsat_core(debug=False):
+    solver = Sat_Solver(propositional_Formula.parse('(((~p|x)&(~q|~x))&((~r|~s)&(t|u)))'))
+    msg, core = solver.solve(['t', 'r', 'p', 's', 'q'])
+    if debug:
+        print(msg, core)
+    assert msg == UNSAT_MSG and sorted(core) == ['r', 's']
+    msg, core = solver.solve(['t', 'p', 'q'])
+    assert msg == UNSAT_MSG and sorted(core) == ['p', 'q']
+    assert solver.solve(['p', '~r'])[0] == SAT_MSG
+
+    # every assumption of a shrunk core is needed
+    clauses = pigeonhole_clauses(3)
+    selectors = ['x%d' % (13 + i) for i in range(len(clauses))]
+    solver = Sat_Solver(propositional_Formula.parse(clauses_to_cnf_string(
+        [clause + [-13 - i] for i, clause in enumerate(clauses)])))
+    msg, core = solver.solve(selectors, shrink_core=True)
+    assert msg == UNSAT_MSG and set(core) <= set(selectors)
+    for selector in core:
+        assert solver.solve([s for s in core if s != selector])[0] == SAT_MSG
+    assert solver.solve()[0] == SAT_MSG
+    assert solver.solve(selectors)[1] != []
+    assert Sat_Solver(clauses=clauses).solve() == (UNSAT_MSG, None)
+
+
+def test_solve_limits(debug=False):
+    clauses = pigeonhole_clauses(8)
+    solver = Sat_Solver(clauses=clauses)
+    msg, statistics = solver.solve(conflict_limit=50)
+    if debug:
+        print(msg, statistics)
+    assert msg == UNKNOWN_MSG and statistics['conflicts'] == 50 and statistics['seconds'] >= 0
+    propagations = solver.propagations
+    msg, statistics = solver.solve(propagation_limit=1000)
+    assert msg == UNKNOWN_MSG and statistics['propagations'] >= propagations + 1000
+    assert solver.solve(time_limit=0)[0] == UNKNOWN_MSG
+    # the next call goes on with what was learned
+    assert Sat_Solver(clauses=pigeonhole_clauses(5)).solve(conflict_limit=10 ** 6) == (UNSAT_MSG, None)
+    assert run_sat_cnf('((p|q)&(~p|~q))', conflict_limit=10)[0] == SAT_MSG
+    assert run_sat_solver('((p1<->p2)&(p2<->~p1))', time_limit=10) == (UNSAT_MSG, None)
+
+    # interrupted from another thread
+    result = []
+    thread = threading.Thread(target=lambda: result.append(solver.solve()))
+    thread.start()
+    solver.interrupt()
+    thread.join()
+    assert result[0][0] == UNKNOWN_MSG and not solver.interrupted
+    solver.interrupt()
+    assert solver.solve()[0] == UNKNOWN_MSG
+
+    # the limits are checked after every conflict, not only before decisions
+    solver = Sat_Solver(clauses=pigeonhole_clauses(5), progress=lambda statistics: solver.interrupt(),
+                        progress_interval=3)
+    msg, statistics = solver.solve()
+    assert msg == UNKNOWN_MSG and statistics['conflicts'] == 3
+
+
+def test_statistics(debug=False):
+    reports = []
+    solver = Sat_Solver(clauses=pigeonhole_clauses(6), timers=True, progress=reports.append, progress_interval=20)
+    assert solver.solve() == (UNSAT_MSG, None)
+    statistics = solver.statistics
+    if debug:
+        print(statistics)
+    assert statistics['conflicts'] > 20 and statistics['decisions'] > 0 and statistics['propagations'] > 0
+    assert 1 <= statistics['average_lbd'] <= 30
+    assert 0 < sum(statistics['timers'].values()) <= statistics['seconds']
+    assert set(statistics['timers']) == {'propagate', 'analyze', 'decide', 'backtrack'}
+    assert len(reports) == statistics['conflicts'] // 20
+    assert [report['conflicts'] for report in reports] == [20 * (i + 1) for i in range(len(reports))]
+    # learned clauses are counted as learned, not as kept
+    assert statistics['learned_clauses'] == statistics['conflicts'] >= statistics['kept_clauses'] > 0
+    solver.reduce_db()
+    after = solver.statistics
+    assert after['learned_clauses'] == statistics['learned_clauses'] and after['deleted_clauses'] > 0
+    assert after['kept_clauses'] == statistics['kept_clauses'] - after['deleted_clauses']
+
+    # without timers the class methods are used as they are
+    solver = Sat_Solver(clauses=pigeonhole_clauses(3))
+    assert 'propagate' not in vars(solver) and 'timers' not in solver.statistics
+
+
+def test_chronological_backtracking(debug=False):
+    rng = random.Random(1)
+    for _ in range(10):
+        clauses = [[rng.choice([-1, 1]) * var for var in rng.sample(range(1, 71), 3)] for _ in range(290)]
+        expected = Sat_Solver(clauses=clauses).solve()[0]
+        solver = Sat_Solver(clauses=clauses, chrono_threshold=0)
+        msg, model = solver.solve()
+        if debug:
+            print(msg, solver.statistics)
+        assert msg == expected
+        if msg == SAT_MSG:
+            assert all(any(model['x%d' % abs(lit)] == (lit > 0) for lit in clause) for clause in clauses)
+            # out of order trail - implied literals are on the highest level of their reason's other literals
+            for lit in solver.trail:
+                reason = solver.reasons[abs(lit)]
+                if reason is not None:
+                    others = [abs(other) for other in solver.clause_db.get_literals(reason) if other != lit]
+                    assert solver.levels[abs(lit)] == max([solver.levels[var] for var in others], default=0)
+    assert Sat_Solver(clauses=pigeonhole_clauses(5), chrono_threshold=0).solve() == (UNSAT_MSG, None)
+    solver = Sat_Solver(clauses=pigeonhole_clauses(3)[1:], chrono_threshold=0)
+    assert solver.solve(['~x1', '~x2'])[0] == SAT_MSG
+
+
+def test_rephasing(debug=False):
+    rng = random.Random(2)
+    clauses = [[rng.choice([-1, 1]) * var for var in rng.sample(range(1, 101), 3)] for _ in range(410)]
+    solver = Sat_Solver(clauses=clauses)
+    msg, model = solver.solve()
+    if debug:
+        print(msg, solver.statistics)
+    assert msg == SAT_MSG and solver.conflicts > 0
+    # the conflict free trails left target and best phases
+    assert solver.best_assigned > 0 and any(solver.best_phases[1:]) and any(solver.target_phases[1:])
+
+    best = list(solver.best_phases)
+    solver.rephase()
+    assert solver.rephases == 1 and solver.statistics['rephases'] == 1
+    assert all(solver.saved_phases[var] == best[var] for var in range(1, 101) if best[var])
+    assert not any(solver.target_phases) and solver.target_assigned == solver.best_assigned == 0
+    solver.rephase()  # walk
+    assert all(phase in (TRUE, FALSE) for phase in solver.saved_phases[1:])
+    solver.rephase()
+    solver.rephase()  # original
+    assert all(solver.saved_phases[var] == solver.initial_phase(var) for var in range(1, 101))
+    solver.rephase()
+    solver.rephase()  # inverted
+    assert all(solver.saved_phases[var] == -solver.initial_phase(var) for var in range(1, 101))
+    assert solver.solve()[0] == SAT_MSG
+
+
+def test_rephasing_is_reproducible(debug=False):
+    rng = random.Random(2)
+    clauses = [[rng.choice([-1, 1]) * var for var in rng.sample(range(1, 101), 3)] for _ in range(410)]
+    first, second = Sat_Solver(clauses=clauses), Sat_Solver(clauses=clauses)
+    phases = []
+    for solver in first, second:
+        solver.solve()
+        for _ in range(8):  # a whole cycle, walk and random included
+            solver.rephase()
+        phases.append(list(solver.saved_phases))
+        solver.solve()
+    if debug:
+        print(first.statistics)
+    # without a seed the walk and random rephases still use a fixed one
+    assert phases[0] == phases[1]
+    assert first.statistics['conflicts'] == second.statistics['conflicts']
@@ -2,6 +2,9 @@
 import propositions.tseitin
 from propositions.syntax import Formula as propositional_Formula
 import propositions.semantics as propositional_semantics
+from propositions.dimacs import cnf_clauses
+from propositions.sat_portfolio import solve_portfolio
+from propositions.sat_cube import solve_cubes
 
 # predicate imports
 import predicates.smt_solver
@@ -11,14 +14,16 @@ from propositions.sat_solver import Sat_Solver
 from propositions.sat_solver import UNSAT_MSG
 from propositions.sat_solver import SAT_MSG
 from propositions.sat_solver import BACKTRACK_MSG
+from propositions.sat_solver import UNKNOWN_MSG
 from linear_programing.simplex_solver import run_simplex
 
 BUG_MSG = "This shouldn't be here"
 
 from solver_helper import *
 
-def run_sat_solver(formula: str):
-    """preprocess non cnf formula with redundancies and then hand off to sat solver"""
+def run_sat_solver(formula: str, conflict_limit: int = None, propagation_limit: int = None, time_limit: float = None):
+    """preprocess non cnf formula with redundancies and then hand off to sat solver. Once a limit is reached
+    return (UNKNOWN_MSG, statistics)"""
     f_prop = propositional_Formula.parse(formula)
 
     # tseitin and preprocessing
@@ -35,7 +40,11 @@ def run_sat_solver(formula: str):
             return SAT_MSG, str(model)
 
     # deduction steps
-    msg, settings = run_sat_cnf(str(f_tseitin_processed))
+    clauses = [pos + ['~' + name for name in neg] for pos, neg in cnf_clauses(f_tseitin_processed)]
+    sat_solver = Sat_Solver(clauses=clauses)
+    sat_solver.preprocess()
+    msg, settings = sat_solver.solve(conflict_limit=conflict_limit, propagation_limit=propagation_limit,
+                                     time_limit=time_limit)
     if msg == SAT_MSG:
         original_variables = f_prop.variables()
         original_settings = {key: settings[key] for key in original_variables}
@@ -44,49 +53,38 @@ def run_sat_solver(formula: str):
         return msg, settings
 
 
-def run_sat_cnf(formula: str):
-    """run sat solver on CNF formula without redundancies"""
+def run_sat_cnf(formula: str, conflict_limit: int = None, propagation_limit: int = None, time_limit: float = None):
+    """run sat solver on CNF formula without redundancies. Once a limit is reached return (UNKNOWN_MSG,
+    statistics)"""
     f_prop = propositional_Formula.parse(formula)
     to_solve = Sat_Solver(f_prop)
+    return to_solve.solve(conflict_limit=conflict_limit, propagation_limit=propagation_limit, time_limit=time_limit)
 
-    msg, _ = to_solve.start_sat()
-    if msg is not True:
-        return msg, None
-
-    to_decide = True
-    decision_var = BUG_MSG
-
-    while True:
 
-        # decide
-        if to_decide:
-            decision_var, assignments = to_solve.decide()
-            if decision_var == SAT_MSG:
-                return SAT_MSG, assignments
-        else:
-            to_decide = True
-
-        # propagate
-        assert decision_var != BUG_MSG  # sanity check
-        conflict_clause, backjump_level = to_solve.propagate(decision_var)
+def run_sat_portfolio(formula: str, workers: int = None, timeout: float = None):
+    """run a portfolio of diversified sat solvers in parallel on CNF formula, first answer wins. Return
+    (UNKNOWN_MSG, None) if there was none within timeout seconds"""
+    f_prop = propositional_Formula.parse(formula)
+    clauses = [pos + ['~' + name for name in neg] for pos, neg in cnf_clauses(f_prop)]
+    return solve_portfolio(clauses, workers, timeout=timeout)
 
-        # backtrack
-        if conflict_clause is not True and conflict_clause != UNSAT_MSG:
-            to_solve.backtrack(conflict_clause, backjump_level)
-            to_decide = False
-            decision_var = BACKTRACK_MSG
 
-        if conflict_clause is UNSAT_MSG:
-            return UNSAT_MSG, None
+def run_sat_cubes(formula: str, workers: int = None, timeout: float = None):
+    """run cube-and-conquer on CNF formula - lookahead cubes solved by a pool of incremental sat solvers. Return
+    (UNKNOWN_MSG, None) if there was no answer within timeout seconds"""
+    f_prop = propositional_Formula.parse(formula)
+    clauses = [pos + ['~' + name for name in neg] for pos, neg in cnf_clauses(f_prop)]
+    return solve_cubes(clauses, workers=workers, timeout=timeout)
 
 
-def run_smt_solver(formula: str):
-    """run smt solver along with sat solver"""
+def run_smt_solver(formula: str, chrono_threshold: int = None):
+    """run smt solver along with sat solver, backtracking chronologically over jumps of more than chrono_threshold
+    levels if given"""
     smt_solver = predicates.smt_solver.SmtSolver(formula)
     # get boolean abstraction
     prop_f = smt_solver.propositional_skeleton
 
-    sat_solver = Sat_Solver(prop_f)
+    sat_solver = Sat_Solver(prop_f, chrono_threshold=chrono_threshold)
 
     msg, _ = sat_solver.start_sat()
     # UNSAT at level 0 by SAT solver
@@ -7,10 +7,10 @@ from propositions.sat_solver import BACKTRACK_MSG
 
 def sat_backjump_helper(sat_solver, smt_solver, sat_smt_level_mappings, c, jump_level, dpoints_settings):
     """run backjump that arises from SAT solver given conflict clause"""
-    original_sat_level = sat_solver.level
     sat_solver.backtrack(c, jump_level)
-    smt_solver.t_backtrack(sat_smt_level_mappings[jump_level])
-    for i in range(original_sat_level, jump_level, -1):  # @todo may need -1
+    level = sat_solver.level  # above jump_level with chronological backtracking
+    smt_solver.t_backtrack(sat_smt_level_mappings[level])
+    for i in sorted([i for i in sat_smt_level_mappings if i > level], reverse=True):
         if len(dpoints_settings) == sat_smt_level_mappings[i]:
             dpoints_settings.pop()
         del sat_smt_level_mappings[i]
@@ -41,10 +41,10 @@ def smt_backjump_helper(sat_solver, dpoints_settings, smt_solver, sat_smt_level_
     - (None) if succesfully propagated at some level. All relevant objects modified in place"""
     c = smt_solver.t_explain(dpoints_settings)
     c, jump_level = sat_solver.create_clause_jump_level(c)
-    original_sat_level = sat_solver.level
     sat_solver.backtrack(c, jump_level)
-    smt_solver.t_backtrack(sat_smt_level_mappings[jump_level])
-    for i in range(original_sat_level, jump_level, -1):  # @todo may need -1
+    level = sat_solver.level  # above jump_level with chronological backtracking
+    smt_solver.t_backtrack(sat_smt_level_mappings[level])
+    for i in sorted([i for i in sat_smt_level_mappings if i > level], reverse=True):
         del sat_smt_level_mappings[i]
 
 
@@ -39,4 +39,11 @@ def test_smt_false(debug=False):
 def test_smt_true(debug=False):
     for f in smt_formulas_true:
         a = solver.run_smt_solver(f)
-        assert a[0] == solver.SAT_MSG
\ No newline at end of file
+        assert a[0] == solver.SAT_MSG
+
+
+def test_smt_chronological_backtracking(debug=False):
+    for f in smt_formulas + smt_formulas_true:
+        assert solver.run_smt_solver(f, chrono_threshold=0)[0] == solver.SAT_MSG
+    for f in smt_formulas_false:
+        assert solver.run_smt_solver(f, chrono_threshold=0)[0] == solver.UNSAT_MSG